@@ -0,0 +1,195 @@
+"""
+Benchmark: satu RandomForest per ticker vs satu global model lintas ticker.
+
+Membandingkan akurasi (MAPE), total ukuran artifact dan RSS saat serving
+(semua model dimuat + forecast 7 hari untuk setiap ticker) pada data sintetis.
+
+    python -m benchmarks.bench_global_model --sizes 5 50 500
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PARAMS = {'n_estimators': 100, 'max_depth': 10}
+
+# Dijalankan di proses terpisah supaya RSS tiap mode terukur bersih
+_SERVE_SCRIPT = r"""
+import json, os, resource, sys, time
+from src.feature_store import load_features
+from src.forecasting import recursive_forecast_prices
+from src.global_model import GlobalTickerModel, global_model_path
+from src.model_registry import load_model, model_path
+
+def rss_mb():
+    # RSS saat ini (Linux); fallback ke peak RSS di OS lain
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+data_path, model_dir, mode = sys.argv[1], sys.argv[2], sys.argv[3]
+tickers = json.loads(sys.argv[4])
+feature_sets = {t: load_features(data_path, t) for t in tickers}
+rss_before = rss_mb()
+
+start = time.perf_counter()
+models = {}
+if mode == "global":
+    bundle = load_model(global_model_path(model_dir))
+    for t in tickers:
+        if t in bundle["fallback"]:
+            models[t] = load_model(model_path(model_dir, t))["model"]
+        else:
+            models[t] = GlobalTickerModel(bundle, t, feature_sets[t])
+else:
+    for t in tickers:
+        models[t] = load_model(model_path(model_dir, t))["model"]
+load_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+for t in tickers:
+    recursive_forecast_prices(models[t], feature_sets[t], days=7)
+predict_seconds = time.perf_counter() - start
+
+rss_after = rss_mb()
+print(json.dumps({
+    "rss_mb": rss_after,
+    "rss_models_mb": rss_after - rss_before,
+    "load_seconds": load_seconds,
+    "predict_seconds": predict_seconds,
+}))
+"""
+
+
+def _file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def train_per_ticker(data_path, tickers, model_dir, params):
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from src.feature_store import load_features, training_frame
+    from src.model_registry import save_model, model_path
+
+    mapes = {}
+    for ticker in tickers:
+        feature_set = load_features(data_path, ticker)
+        X, y, _ = training_frame(feature_set)
+        split_idx = int(len(X) * 0.8)
+        model = RandomForestRegressor(random_state=42, **params)
+        model.fit(X.iloc[:split_idx], y.iloc[:split_idx])
+        predictions = model.predict(X.iloc[split_idx:])
+        actual = y.iloc[split_idx:].values
+        mapes[ticker] = float(np.mean(np.abs((actual - predictions) / actual)) * 100)
+        save_model(model, model_path(model_dir, ticker), feature_set["feature_names"],
+                   params=params, metrics={"mape": mapes[ticker]})
+    return mapes
+
+
+def serve(data_path, model_dir, mode, tickers):
+    out = subprocess.run(
+        [sys.executable, "-c", _SERVE_SCRIPT, data_path, model_dir, mode, json.dumps(tickers)],
+        capture_output=True, text=True, check=True, env=os.environ.copy(),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_size(n_tickers, n_days, params, workdir):
+    from benchmarks.synthetic import write_synthetic_csv
+    from src.feature_store import materialize_features
+    from src.global_model import train_global_model, global_model_path
+    from src.model_registry import model_path
+
+    data_path = os.path.join(workdir, f"stock_{n_tickers}.csv")
+    model_dir = os.path.join(workdir, f"models_{n_tickers}")
+    os.makedirs(model_dir, exist_ok=True)
+    tickers = write_synthetic_csv(data_path, n_tickers, n_days)
+    materialize_features(data_path, tickers)
+
+    start = time.perf_counter()
+    single_mapes = train_per_ticker(data_path, tickers, model_dir, params)
+    single_train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bundle = train_global_model(data_path, tickers, params, model_dir=model_dir)
+    global_train_seconds = time.perf_counter() - start
+
+    per_ticker_global = bundle["metrics"]["per_ticker"]
+    fallback = bundle["fallback"]
+    effective_mapes = [
+        single_mapes[t] if t in fallback else per_ticker_global[t]["mape"]
+        for t in tickers
+    ]
+
+    single_bytes = sum(_file_size(model_path(model_dir, t)) for t in tickers)
+    global_bytes = _file_size(global_model_path(model_dir)) + sum(
+        _file_size(model_path(model_dir, t)) for t in fallback
+    )
+
+    return {
+        "tickers": n_tickers,
+        "per_ticker": {
+            "mape": sum(single_mapes.values()) / len(single_mapes),
+            "artifact_mb": single_bytes / 1024 ** 2,
+            "train_seconds": single_train_seconds,
+            "serving": serve(data_path, model_dir, "per_ticker", tickers),
+        },
+        "global": {
+            "mape": sum(m["mape"] for m in per_ticker_global.values()) / len(per_ticker_global),
+            "mape_with_fallback": sum(effective_mapes) / len(effective_mapes),
+            "fallback_tickers": len(fallback),
+            "artifact_mb": global_bytes / 1024 ** 2,
+            "train_seconds": global_train_seconds,
+            "serving": serve(data_path, model_dir, "global", tickers),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--days", type=int, default=1250, help="Jumlah bar per ticker (~5 tahun)")
+    parser.add_argument("--n-estimators", type=int, default=PARAMS['n_estimators'])
+    parser.add_argument("--max-depth", type=int, default=PARAMS['max_depth'])
+    parser.add_argument("--output", default=None, help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    params = {'n_estimators': args.n_estimators, 'max_depth': args.max_depth}
+    workdir = tempfile.mkdtemp(prefix="bench_global_")
+    # Harus di-set sebelum modul src diimport (default cache dibaca saat import)
+    os.environ["FEATURE_CACHE_DIR"] = os.path.join(workdir, "features")
+
+    results = []
+    for n_tickers in args.sizes:
+        print(f"\n=== {n_tickers} ticker x {args.days} bar ===")
+        result = run_size(n_tickers, args.days, params, workdir)
+        results.append(result)
+        shutil.rmtree(os.path.join(workdir, f"models_{n_tickers}"), ignore_errors=True)
+
+        for mode in ("per_ticker", "global"):
+            r = result[mode]
+            print(f"  {mode:<10} MAPE {r['mape']:6.2f}% | artifact {r['artifact_mb']:8.1f} MB | "
+                  f"RSS model {r['serving']['rss_models_mb']:8.1f} MB | "
+                  f"load {r['serving']['load_seconds']:.2f}s | forecast {r['serving']['predict_seconds']:.2f}s")
+        print(f"  global + fallback ({result['global']['fallback_tickers']} ticker): "
+              f"MAPE {result['global']['mape_with_fallback']:.2f}%")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nHasil tersimpan di: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark regresi performa train_model per tahap (load_features, fit,
+render, upload artifact, save_model, ...) pada data sintetis beberapa ukuran.
+
+Setiap ukuran dijalankan --repeat kali (cache fitur dikosongkan tiap run
+supaya parse CSV ikut terukur) dan diambil median-nya, lalu dibandingkan
+dengan baseline. Exit code 1 jika ada tahap yang melewati ambang.
+
+    python -m benchmarks.bench_training                      # cek vs baseline
+    python -m benchmarks.bench_training --update-baseline    # tulis baseline baru
+    python -m benchmarks.bench_training --n-estimators 200 --n-jobs -1 --no-baseline
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "training.json")
+PARAMS = {'n_estimators': 100, 'max_depth': 10}
+
+# Tahap dianggap regresi jika lebih lambat dari baseline * (1 + TOLERANCE)
+# DAN selisihnya lebih dari MIN_SECONDS (tahap sangat cepat terlalu berisik)
+TOLERANCE = 0.25
+MIN_SECONDS = 0.05
+MEMORY_TOLERANCE = 0.25
+MIN_MB = 5.0
+
+
+def _size_key(n_days):
+    return f"{n_days}_bars"
+
+
+def run_size(n_days, params, repeat, workdir):
+    from prefect import flow
+    from benchmarks.synthetic import write_synthetic_csv
+    from src import feature_store
+    from src.model_training import train_model
+    from src.profiling import load_report
+
+    data_path = os.path.join(workdir, f"stock_{n_days}.csv")
+    ticker = write_synthetic_csv(data_path, 1, n_days)[0]
+
+    # Artifact Prefect butuh flow run; task dipanggil langsung (.fn) supaya
+    # overhead orkestrasi task tidak ikut terukur
+    @flow(name="bench-training")
+    def bench_flow():
+        train_model.fn(data_path, ticker, params)
+
+    runs = []
+    for _ in range(repeat):
+        shutil.rmtree(feature_store.FEATURE_CACHE_DIR, ignore_errors=True)
+        feature_store._memory_cache.clear()
+        bench_flow()
+        runs.append(load_report(ticker))
+
+    stages = {}
+    for stage in [s["stage"] for s in runs[0]["stages"]]:
+        entries = [next(s for s in run["stages"] if s["stage"] == stage) for run in runs]
+        stages[stage] = {
+            "seconds": statistics.median(e["seconds"] for e in entries),
+            "peak_mb": statistics.median(e.get("peak_mb", 0) for e in entries),
+        }
+    return {
+        "total_seconds": statistics.median(run["total_seconds"] for run in runs),
+        "stages": stages,
+    }
+
+
+def compare(results, baseline):
+    """Return daftar pesan regresi (kosong = lolos)."""
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            print(f"  (tidak ada baseline untuk {size}, dilewati)")
+            continue
+        for stage, current in result["stages"].items():
+            ref = base["stages"].get(stage)
+            if ref is None:
+                continue
+            slower = current["seconds"] - ref["seconds"]
+            if current["seconds"] > ref["seconds"] * (1 + TOLERANCE) and slower > MIN_SECONDS:
+                regressions.append(
+                    f"{size} {stage}: {current['seconds']:.3f}s vs baseline {ref['seconds']:.3f}s"
+                )
+            grown = current["peak_mb"] - ref["peak_mb"]
+            if current["peak_mb"] > ref["peak_mb"] * (1 + MEMORY_TOLERANCE) and grown > MIN_MB:
+                regressions.append(
+                    f"{size} {stage}: peak {current['peak_mb']:.1f} MB vs baseline {ref['peak_mb']:.1f} MB"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1250, 2500], help="Jumlah bar per ticker")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--n-estimators", type=int, default=PARAMS['n_estimators'])
+    parser.add_argument("--max-depth", type=int, default=PARAMS['max_depth'])
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--no-baseline", action="store_true", help="Hanya tampilkan hasil (untuk tuning)")
+    parser.add_argument("--output", default=None, help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    params = {'n_estimators': args.n_estimators, 'max_depth': args.max_depth}
+    if args.n_jobs is not None:
+        params['n_jobs'] = args.n_jobs
+
+    workdir = tempfile.mkdtemp(prefix="bench_training_")
+    # Harus di-set sebelum modul src/prefect diimport: cache fitur, laporan
+    # profil, model dan database artifact Prefect semuanya di direktori sementara
+    os.environ["FEATURE_CACHE_DIR"] = os.path.join(workdir, "features")
+    os.environ["PROFILE_DIR"] = os.path.join(workdir, "profiles")
+    os.environ["PREFECT_HOME"] = os.path.join(workdir, "prefect")
+    os.environ.pop("PREFECT_API_URL", None)
+    os.environ.pop("PREFECT_API_KEY", None)
+    cwd = os.getcwd()
+    sys.path.insert(0, cwd)
+    os.chdir(workdir)
+
+    try:
+        results = {}
+        for n_days in args.sizes:
+            print(f"\n=== 1 ticker x {n_days} bar ({params}) ===")
+            result = run_size(n_days, params, args.repeat, workdir)
+            results[_size_key(n_days)] = result
+            for stage, r in result["stages"].items():
+                print(f"  {stage:<18} {r['seconds']:8.3f}s | peak {r['peak_mb']:8.1f} MB")
+            print(f"  {'TOTAL':<18} {result['total_seconds']:8.3f}s")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    payload = {"params": params, "repeat": args.repeat, "sizes": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nHasil tersimpan di: {args.output}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nBaseline diperbarui: {args.baseline}")
+        return 0
+
+    if args.no_baseline:
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️  Baseline belum ada ({args.baseline}); jalankan dengan --update-baseline.")
+        return 1
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("params") != params:
+        print(f"\n⚠️  Params berbeda dari baseline ({baseline.get('params')}); hasil tidak dibandingkan.")
+        return 0
+
+    print("\n=== Perbandingan vs baseline ===")
+    regressions = compare(results, baseline)
+    for message in regressions:
+        print(f"  ❌ {message}")
+    if regressions:
+        return 1
+    print("  ✅ Tidak ada regresi.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_tickers(n_tickers):
+    return [f"SYN{i:03d}.JK" for i in range(n_tickers)]
+
+
+def synthetic_ohlcv(n_tickers, n_days, seed=42):
+    """
+    Data OHLCV sintetis berformat sama dengan data/raw/stock_data.csv
+    (random walk geometrik, harga dan volume berbeda skala per ticker).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n_days)
+    frames = []
+    for ticker in synthetic_tickers(n_tickers):
+        start = rng.uniform(100, 10000)
+        close = start * np.exp(np.cumsum(rng.normal(0.0002, 0.015, n_days)))
+        spread = np.abs(rng.normal(0, 0.01, n_days))
+        frames.append(pd.DataFrame({
+            'Date': dates,
+            'Open': close * (1 + rng.normal(0, 0.005, n_days)),
+            'High': close * (1 + spread),
+            'Low': close * (1 - spread),
+            'Close': close,
+            'Adj Close': close,
+            'Volume': rng.integers(10**5, 10**8, n_days) * rng.uniform(0.1, 10),
+            'Dividends': 0.0,
+            'Stock Splits': 0.0,
+            'Ticker': ticker,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_synthetic_csv(path, n_tickers, n_days, seed=42):
+    df = synthetic_ohlcv(n_tickers, n_days, seed)
+    df.to_csv(path, index=False)
+    return synthetic_tickers(n_tickers)
@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import jsonify
+
+
+class Saturated(Exception):
+    """Lane penuh (slot + antrian habis) atau terlalu lama menunggu slot."""
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"Lane '{lane}' sedang penuh")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Request melewati batas waktu komputasinya."""
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"Batas waktu komputasi lane '{lane}' terlampaui")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Deadline:
+    def __init__(self, seconds, lane="default", retry_after=1):
+        self.expires_at = time.monotonic() + seconds
+        self.lane = lane
+        self.retry_after = retry_after
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded(self.lane, self.retry_after)
+
+
+class ComputeLane:
+    """
+    Executor terbatas untuk satu kelas endpoint: paling banyak
+    max_concurrency request dihitung bersamaan, paling banyak max_queue
+    request menunggu. Di luar itu request langsung ditolak (503) alih-alih
+    ikut mengantri dan menahan worker.
+    """
+
+    def __init__(self, name, max_concurrency, max_queue, deadline_seconds, max_wait_seconds, retry_after):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after = retry_after
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def new_deadline(self):
+        return Deadline(self.deadline_seconds, self.name, self.retry_after)
+
+    def acquire(self, deadline):
+        with self._lock:
+            if self._running >= self.max_concurrency and self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise Saturated(self.name, self.retry_after)
+            self._waiting += 1
+
+        try:
+            wait = min(self.max_wait_seconds, deadline.remaining())
+            acquired = self._slots.acquire(timeout=wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        if not acquired:
+            with self._lock:
+                self._rejected += 1
+            raise Saturated(self.name, self.retry_after)
+
+        with self._lock:
+            self._running += 1
+
+    def release(self):
+        with self._lock:
+            self._running -= 1
+        self._slots.release()
+
+    def record_timeout(self):
+        with self._lock:
+            self._timed_out += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._running,
+                "waiting": self._waiting,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "deadline_seconds": self.deadline_seconds,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+            }
+
+
+def _lane_from_env(name, concurrency, queue, deadline, max_wait, retry_after):
+    prefix = f"LANE_{name.upper()}_"
+    return ComputeLane(
+        name,
+        max_concurrency=int(os.getenv(prefix + "CONCURRENCY", concurrency)),
+        max_queue=int(os.getenv(prefix + "QUEUE", queue)),
+        deadline_seconds=float(os.getenv(prefix + "DEADLINE", deadline)),
+        max_wait_seconds=float(os.getenv(prefix + "MAX_WAIT", max_wait)),
+        retry_after=int(os.getenv(prefix + "RETRY_AFTER", retry_after)),
+    )
+
+
+# Lane terpisah: lonjakan /portfolio tidak menghabiskan slot /predict.
+# Endpoint ringan (/health, /, /available-tickers) tidak lewat lane sama sekali.
+# Batas berlaku per proses worker gunicorn.
+LANES = {
+    "predict": _lane_from_env("predict", concurrency=4, queue=16, deadline=15, max_wait=2, retry_after=1),
+    "portfolio": _lane_from_env("portfolio", concurrency=2, queue=4, deadline=60, max_wait=5, retry_after=5),
+}
+
+_local = threading.local()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
+
+def check_deadline():
+    """Dipanggil di titik aman dalam loop komputasi (mis. per ticker)."""
+    deadline = getattr(_local, "deadline", None)
+    if deadline is not None:
+        deadline.check()
+
+
+def overloaded_response(error):
+    response = jsonify({
+        "error": "Server sedang sibuk, silakan coba lagi.",
+        "details": str(error),
+        "retry_after": error.retry_after,
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+class GuardedStream:
+    """
+    Body response streaming yang memegang slot lane (dan deadline tetap
+    aktif) selama stream berjalan. Slot dilepas di close(), yang selalu
+    dipanggil server WSGI setelah response selesai atau client putus,
+    termasuk jika body tidak pernah dibaca sama sekali.
+    """
+
+    def __init__(self, iterable, lane, deadline):
+        self._iterable = iterable
+        self._lane = lane
+        self._deadline = deadline
+        self._lock = threading.Lock()
+        self._released = False
+
+    def __iter__(self):
+        iterator = iter(self._iterable)
+        while True:
+            with deadline_scope(self._deadline):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    # Stream selesai: slot dilepas sekarang, close() nanti no-op
+                    self.close()
+                    return
+            yield chunk
+
+    def close(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        try:
+            close = getattr(self._iterable, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._lane.release()
+
+
+def admit(lane_name):
+    """
+    Decorator view Flask: request harus mendapat slot di lane sebelum
+    dihitung. Jika lane penuh atau deadline habis -> 503 + Retry-After.
+    """
+    lane = LANES[lane_name]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            deadline = lane.new_deadline()
+            try:
+                lane.acquire(deadline)
+            except Saturated as e:
+                return overloaded_response(e)
+
+            streamed = False
+            try:
+                with deadline_scope(deadline):
+                    response = view(*args, **kwargs)
+
+                if getattr(response, "is_streamed", False):
+                    response.response = GuardedStream(response.response, lane, deadline)
+                    streamed = True
+                return response
+            except DeadlineExceeded as e:
+                lane.record_timeout()
+                return overloaded_response(e)
+            finally:
+                if not streamed:
+                    lane.release()
+
+        return wrapper
+
+    return decorator
+
+
+def lane_stats():
+    return {name: lane.stats() for name, lane in LANES.items()}
@@ -1,14 +1,34 @@
 import os
-import joblib
 import subprocess
+import numpy as np
 import pandas as pd
-from datetime import timedelta
 from flask import Flask, request, jsonify, render_template
+from src.feature_store import load_features
+from src.forecasting import recursive_forecast_prices, iter_recursive_forecast
+from src.model_registry import load_model, model_filename, model_path as get_model_path
+from src.global_model import GlobalTickerModel, global_model_path, GLOBAL_MODEL_FILENAME
+from src.catalog import Catalog
+from src.bars import DEFAULT_INTERVAL, INTERVALS, resolve_source, is_intraday, date_format, next_timestamps, horizon_text
+from src.trading_calendar import forecast_dates as trading_forecast_dates
+from src.responses import json_response, wants_compact, sse_event, sse_response
+from src.admission import admit, check_deadline, lane_stats, DeadlineExceeded, LANES
+from src import artifact_sync
 
 def init_dvc_runtime():
     """
     Mendownload data terbaru dari DVC (Google Drive) saat aplikasi Start-up.
+    Jika ARTIFACT_REMOTE di-set, hanya file yang berubah (menurut manifest)
+    yang diambil; DVC pull penuh dipakai sebagai fallback.
     """
+    artifact_remote = os.getenv("ARTIFACT_REMOTE")
+    if artifact_remote:
+        print("\n🔄 [INIT] Sinkronisasi artifact (delta) dari remote...")
+        try:
+            artifact_sync.pull(artifact_sync.remote_from_url(artifact_remote))
+            return
+        except Exception as e:
+            print(f"❌ [INIT] Delta sync gagal, fallback ke DVC: {e}")
+
     print("\n🔄 [INIT] Memulai DVC Runtime Pull...")
     
     
@@ -53,56 +73,53 @@ app = Flask(__name__)
 # Konfig-
 MODEL_DIR = os.getenv("MODEL_DIR", "models")
 DATA_PATH = os.getenv("DATA_PATH", "data/raw/stock_data.csv")
+# "per_ticker" (satu model per saham) atau "global" (satu model lintas saham)
+MODEL_MODE = os.getenv("MODEL_MODE", "per_ticker")
+# Batas horizon forecast per request (hari / bar)
+MAX_FORECAST_DAYS = int(os.getenv("MAX_FORECAST_DAYS", 365))
+
+# Global model cukup dimuat sekali per proses (reload jika file berubah)
+_global_model_cache = {"mtime": None, "bundle": None}
+
+# Ticker, ringkasan data & metadata model di memori (di-refresh via stat polling)
+catalog = Catalog(DATA_PATH, MODEL_DIR)
+_available_cache = {"version": None, "payload": None}
 
 # Data
 
-def get_latest_market_data_from_csv(ticker, data_path):
-   
+def get_latest_market_data_from_csv(ticker, data_path, feature_names=None, interval=DEFAULT_INTERVAL, resample_to=None):
+    """
+    Feature set (fitur + rolling state) + 30 bar histori, dibaca dari feature
+    store yang SAMA dengan training pipeline (CSV hanya di-parse ulang jika berubah).
+    resample_to: bar di data_path lebih halus dan di-resample ke interval ini.
+    """
     try:
         
         if not os.path.exists(data_path):
             print(f"File tidak ditemukan: {data_path}")
             return None, None, None, None
         
-        df = pd.read_csv(data_path)
-        df['Date'] = pd.to_datetime(df['Date'])
-        
+        feature_set = load_features(data_path, ticker, feature_names=feature_names, interval=resample_to)
         
-        df_ticker = df[df['Ticker'] == ticker].copy()
-        
-        if df_ticker.empty:
+        if feature_set is None:
             print(f"Ticker {ticker} tidak ditemukan di CSV")
             return None, None, None, None
         
-    
-        df_ticker = df_ticker.sort_values('Date').reset_index(drop=True)
-        
-        
-        last_date = df_ticker['Date'].iloc[-1]
-        last_close = df_ticker['Close'].iloc[-1]
-        
-        
-        feature_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-        last_row_features = df_ticker.iloc[[-1]][feature_cols].copy()
-        
         
-        last_row_features = last_row_features.fillna(method='ffill').fillna(0)
+        last_date = pd.Timestamp(feature_set["dates"][-1])
+        last_close = float(feature_set["close"][-1])
         
         
-        history_df = df_ticker.tail(30)[['Date', 'Close']].copy()
-        history_df['Date'] = history_df['Date'].dt.strftime('%Y-%m-%d')
-        history_prices = history_df['Close'].values.flatten().tolist()
-        
         history_final = pd.DataFrame({
-            'Date': history_df['Date'].values,
-            'Close': history_prices
+            'Date': pd.to_datetime(feature_set["dates"][-30:]).strftime(date_format(interval)),
+            'Close': feature_set["close"][-30:]
         })
         
-        print(f"✅ Data loaded from CSV: {ticker}")
-        print(f"   Last Date: {last_date.strftime('%Y-%m-%d')}")
+        print(f"✅ Data loaded from feature store: {ticker}")
+        print(f"   Last Date: {last_date.strftime(date_format(interval))}")
         print(f"   Last Price: Rp {last_close:,.0f}")
         
-        return last_row_features, last_close, last_date, history_final
+        return feature_set, last_close, last_date, history_final
         
     except Exception as e:
         print(f"❌ Error loading data from CSV: {e}")
@@ -110,44 +127,88 @@ def get_latest_market_data_from_csv(ticker, data_path):
         traceback.print_exc()
         return None, None, None, None
 
-def recursive_forecast(model, last_row_features, current_price, last_date, days=7):
+def recursive_forecast(model, feature_set, current_price, last_date, days=7, interval=DEFAULT_INTERVAL):
     """
-    Forecasting logic - IDENTIK dengan model_training.py
+    Forecasting logic - IDENTIK dengan model_training.py (src/forecasting.py)
+    Deadline request dicek di setiap langkah forecast.
     """
-    future_predictions = []
-    future_dates = []
-    
-    current_input = last_row_features.values.copy()
-    feature_names = ['Open', 'High', 'Low', 'Close', 'Volume']
-    
-    curr_date_obj = last_date
-    
-    for i in range(days):
-        # A. Prediksi
-        current_input_df = pd.DataFrame(current_input, columns=feature_names)
-        pred_price = model.predict(current_input_df)[0]
-        
-        # B. Bulatkan
-        pred_price_rounded = round(pred_price, 0)
-        future_predictions.append(pred_price_rounded)
-        
-        # C. Tanggal
-        curr_date_obj = curr_date_obj + timedelta(days=1)
-        future_dates.append(curr_date_obj.strftime('%Y-%m-%d'))
-        
-        # D. Recursive Update (IDENTIK dengan model_training.py)
-        current_input[0, 3] = pred_price          # Close
-        current_input[0, 0] = pred_price          # Open
-        current_input[0, 1] = pred_price * 1.01   # High
-        current_input[0, 2] = pred_price * 0.99   # Low
-        # Volume tidak diubah
+    future_predictions = recursive_forecast_prices(model, feature_set, days=days, on_step=check_deadline)
+    future_dates = forecast_dates_for(last_date, days, interval)
     
     return future_predictions, future_dates
 
-def generate_recommendation(current_price, future_prices):
+def parse_days(value):
+    """Horizon forecast dari request: bilangan bulat 1..MAX_FORECAST_DAYS."""
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("'days' harus bilangan bulat.")
+    if not 1 <= days <= MAX_FORECAST_DAYS:
+        raise ValueError(f"'days' harus antara 1 dan {MAX_FORECAST_DAYS}.")
+    return days
+
+def forecast_dates_for(last_date, days, interval=DEFAULT_INTERVAL):
+    """
+    Tanggal forecast sesuai kalender bursa (akhir pekan & libur BEI dilewati).
+    Harian: tuple yang di-cache per (last_date, days), dipakai bersama oleh
+    semua posisi portfolio.
+    """
+    if is_intraday(interval):
+        return next_timestamps(last_date, days, interval).strftime(date_format(interval)).tolist()
+    return trading_forecast_dates(last_date, days)
+
+def get_global_bundle():
+    info = catalog.model_info(GLOBAL_MODEL_FILENAME)
+    if info is None:
+        return None
+    if _global_model_cache["mtime"] != info["mtime_ns"]:
+        _global_model_cache["bundle"] = load_model(global_model_path(MODEL_DIR))
+        _global_model_cache["mtime"] = info["mtime_ns"]
+    return _global_model_cache["bundle"]
+
+def model_source_for(ticker, interval=DEFAULT_INTERVAL):
+    """
+    Menentukan model mana yang dipakai untuk ticker sesuai MODEL_MODE,
+    tanpa memuat model per-ticker: 'global', 'per_ticker' atau None.
+    Di mode global, ticker yang ditandai fallback saat training memakai
+    model per-ticker-nya (jika ada). Global model hanya untuk bar harian.
     """
-    Membuat sinyal rekomendasi (IDENTIK dengan model_training.py)
+    has_single = catalog.model_info(model_filename(ticker, interval)) is not None
+
+    if MODEL_MODE == "global" and interval == DEFAULT_INTERVAL:
+        global_info = catalog.model_info(GLOBAL_MODEL_FILENAME)
+        if global_info is not None:
+            fallback = global_info["fallback"]
+            if fallback is None:  # artifact tanpa sidecar: baca dari bundle
+                fallback = get_global_bundle()["fallback"]
+            if not (ticker in fallback and has_single):
+                return "global"
+
+    return "per_ticker" if has_single else None
+
+def resolve_model(ticker, interval=DEFAULT_INTERVAL):
+    """Return (bundle, source), atau (None, None) jika belum ada model."""
+    source = model_source_for(ticker, interval)
+    if source == "global":
+        return get_global_bundle(), source
+    if source == "per_ticker":
+        return load_model(get_model_path(MODEL_DIR, ticker, interval)), source
+    return None, None
+
+def horizon_label(days, interval):
+    return f"{days} Bars ({interval})" if is_intraday(interval) else f"{days} Days"
+
+def build_predictor(bundle, source, ticker, feature_set):
+    if source == "global":
+        return GlobalTickerModel(bundle, ticker, feature_set)
+    return bundle["model"]
+
+def generate_recommendation(current_price, future_prices, horizon=None):
     """
+    Membuat sinyal rekomendasi (IDENTIK dengan model_training.py).
+    horizon: teks horizon forecast, default "<n> hari bursa".
+    """
+    horizon = horizon or horizon_text(len(future_prices))
     max_price = max(future_prices)
     min_price = min(future_prices)
     
@@ -156,139 +217,162 @@ def generate_recommendation(current_price, future_prices):
     
     if upside > 2.0:
         signal = "STRONG BUY"
-        reason = f"Potensi Profit: +{upside:.2f}% dalam 7 hari."
+        reason = f"Potensi Profit: +{upside:.2f}% dalam {horizon}."
     elif downside < -2.0:
         signal = "STRONG SELL"
-        reason = f"Risiko Jatuh: {downside:.2f}% dalam 7 hari."
+        reason = f"Risiko Jatuh: {downside:.2f}% dalam {horizon}."
     else:
         signal = "WAIT & HOLD"
         reason = "Pasar Sideways (Datar), tunggu sinyal lebih kuat."
         
     return signal, reason
 
+def recommendation_payload(signal, reason):
+    return {
+        "signal": signal,
+        "reason": reason,
+        "action": "BUY" if "BUY" in signal else ("SELL" if "SELL" in signal else "HOLD")
+    }
+
 # --- ENDPOINTS ---
 
 @app.route('/')
 def index():
     """Homepage dengan UI"""
     try:
-        if os.path.exists(DATA_PATH):
-            df = pd.read_csv(DATA_PATH)
-            tickers = sorted(df['Ticker'].unique().tolist())
-        else:
-            tickers = []
-        
-        return render_template('index.html', tickers=tickers)
+        return render_template('index.html', tickers=catalog.tickers())
     except Exception as e:
         return f"Error loading page: {str(e)}", 500
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    csv_exists = os.path.exists(DATA_PATH)
+    snapshot = catalog.snapshot()
+    csv_exists = snapshot["data_updated_at"] is not None
     return jsonify({
         "status": "healthy", 
         "service": "Stock Prediction API",
         "data_source": "Local CSV",
         "csv_path": DATA_PATH,
-        "csv_available": csv_exists
+        "csv_available": csv_exists,
+        "data_updated_at": snapshot["data_updated_at"],
+        "catalog_refreshed_at": snapshot["refreshed_at"],
+        "compute_lanes": lane_stats()
     }), 200
 
 @app.route('/predict', methods=['POST'])
+@admit("predict")
 def predict():
     try:
         # 1. Parse Request
         data = request.get_json()
         ticker = data.get('ticker')
-        days = data.get('days', 7)
+        interval = data.get('interval', DEFAULT_INTERVAL)
         
         if not ticker:
             return jsonify({"error": "Ticker wajib diisi (misal: BBRI.JK)"}), 400
+        try:
+            days = parse_days(data.get('days', 7))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if interval not in INTERVALS:
+            return jsonify({"error": f"Interval tidak didukung: {interval}", "supported": list(INTERVALS)}), 400
 
         print(f"\n{'='*60}")
-        print(f"📡 API Request: {ticker} for {days} days")
+        print(f"📡 API Request: {ticker} for {horizon_label(days, interval)}")
         print(f"{'='*60}")
 
         # 2. Load Model
-        safe_ticker = ticker.replace(".", "_")
-        model_path = os.path.join(MODEL_DIR, f"model_{safe_ticker}.pkl")
+        bundle, model_source = resolve_model(ticker, interval)
         
-        if not os.path.exists(model_path):
+        if bundle is None:
             return jsonify({
                 "error": f"Model untuk {ticker} belum tersedia.",
                 "suggestion": "Silakan jalankan training pipeline terlebih dahulu."
             }), 404
             
-        model = joblib.load(model_path)
-        print(f"✅ Model loaded: {model_path}")
+        print(f"✅ Model loaded: {ticker} ({model_source})")
         
         
+        data_path, resample_to = resolve_source(interval, DATA_PATH)
         input_features, current_price, last_date, history_df = get_latest_market_data_from_csv(
-            ticker, DATA_PATH
+            ticker, data_path, feature_names=bundle["feature_names"], interval=interval, resample_to=resample_to
         )
         
         if input_features is None:
             return jsonify({
                 "error": f"Gagal mengambil data untuk {ticker} dari CSV",
-                "details": f"Pastikan ticker ada di file: {DATA_PATH}"
+                "details": f"Pastikan ticker ada di file: {data_path}"
             }), 500
 
+        model = build_predictor(bundle, model_source, ticker, input_features)
+
         # 4. Forecasting menggunakan fungsi yang IDENTIK
         future_predictions, future_dates = recursive_forecast(
             model,
             input_features,
             current_price,
             last_date,
-            days=days
+            days=days,
+            interval=interval
         )
         
         print(f"\n📊 Forecast Results:")
         print(f"   Current Price: Rp {current_price:,.0f}")
-        print(f"   {days}-Day Forecast: Rp {future_predictions[-1]:,.0f}")
+        print(f"   {horizon_label(days, interval)} Forecast: Rp {future_predictions[-1]:,.0f}")
         print(f"   Change: {((future_predictions[-1] - current_price)/current_price)*100:+.2f}%")
 
         # 5. Rekomendasi
-        signal, reason = generate_recommendation(current_price, future_predictions)
+        signal, reason = generate_recommendation(current_price, future_predictions, horizon_text(days, interval))
         print(f"   Signal: {signal}")
 
         # 6. Response JSON
+        # compact: hanya array kolom (tanpa forecast_table yang mengulang tanggal & harga)
+        compact = wants_compact(data)
+        forecast_prices = np.asarray(future_predictions, dtype='float64')
+        change_pct = (forecast_prices - current_price) / current_price * 100
+
         response = {
             "meta": {
                 "ticker": ticker,
                 "current_price": float(current_price),
-                "last_updated": last_date.strftime('%Y-%m-%d'),
-                "prediction_horizon": f"{days} Days",
-                "data_source": "Local CSV (stock_data.csv)"
+                "last_updated": last_date.strftime(date_format(interval)),
+                "prediction_horizon": horizon_label(days, interval),
+                "interval": interval,
+                "data_source": f"Local CSV ({os.path.basename(data_path)})"
             },
             "chart_data": {
                 "history_dates": history_df['Date'].tolist(),
-                "history_prices": history_df['Close'].tolist(),
+                "history_prices": history_df['Close'].to_numpy(dtype='float64'),
                 "forecast_dates": future_dates,
-                "forecast_prices": future_predictions
-            },
-            "forecast_table": [
-                {
-                    "date": d, 
-                    "price": p, 
-                    "change": f"{((p - current_price)/current_price)*100:.2f}%"
-                } 
-                for d, p in zip(future_dates, future_predictions)
-            ],
-            "recommendation": {
-                "signal": signal,
-                "reason": reason,
-                "action": "BUY" if "BUY" in signal else ("SELL" if "SELL" in signal else "HOLD")
+                "forecast_prices": forecast_prices
             },
+            "recommendation": recommendation_payload(signal, reason),
             "model_info": {
                 "algorithm": "Random Forest Regressor",
-                "features": ["Open", "High", "Low", "Close", "Volume"],
+                "model_source": model_source,
+                "features": bundle["feature_names"],
                 "note": "Prediksi menggunakan data dari CSV lokal, IDENTIK dengan training pipeline"
             }
         }
 
+        if compact:
+            response["chart_data"]["forecast_change_pct"] = np.round(change_pct, 2)
+        else:
+            response["forecast_table"] = [
+                {
+                    "date": d, 
+                    "price": p, 
+                    "change": f"{c:.2f}%"
+                } 
+                for d, p, c in zip(future_dates, future_predictions, change_pct.tolist())
+            ]
+
         print(f"{'='*60}\n")
-        return jsonify(response)
+        return json_response(response)
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"\n❌ Server Error: {e}")
         import traceback
@@ -297,189 +381,385 @@ def predict():
     
 
 
-@app.route('/portfolio', methods=['POST'])
-def portfolio():
-    """API endpoint to evaluate a portfolio over the next N days.
-    Request JSON: { "positions": [{"ticker": "BBRI.JK", "amount": 1000000}, ...], "days": 7 }
-    Response: daily breakdown + per-ticker forecasts and summary totals
+@app.route('/predict/stream', methods=['POST'])
+@admit("predict")
+def predict_stream():
+    """Versi streaming /predict (Server-Sent Events).
+    Event: meta (harga terkini + histori) -> forecast (satu per hari) -> summary.
     """
+    data = request.get_json() or {}
+    ticker = data.get('ticker')
+    interval = data.get('interval', DEFAULT_INTERVAL)
+
+    if not ticker:
+        return jsonify({"error": "Ticker wajib diisi (misal: BBRI.JK)"}), 400
     try:
-        payload = request.get_json() or {}
-        positions = payload.get('positions', [])
-        days = int(payload.get('days', 7))
+        days = parse_days(data.get('days', 7))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if interval not in INTERVALS:
+        return jsonify({"error": f"Interval tidak didukung: {interval}", "supported": list(INTERVALS)}), 400
+
+    bundle, model_source = resolve_model(ticker, interval)
+    if bundle is None:
+        return jsonify({
+            "error": f"Model untuk {ticker} belum tersedia.",
+            "suggestion": "Silakan jalankan training pipeline terlebih dahulu."
+        }), 404
+
+    data_path, resample_to = resolve_source(interval, DATA_PATH)
+    input_features, current_price, last_date, history_df = get_latest_market_data_from_csv(
+        ticker, data_path, feature_names=bundle["feature_names"], interval=interval, resample_to=resample_to
+    )
+    if input_features is None:
+        return jsonify({
+            "error": f"Gagal mengambil data untuk {ticker} dari CSV",
+            "details": f"Pastikan ticker ada di file: {data_path}"
+        }), 500
+
+    model = build_predictor(bundle, model_source, ticker, input_features)
+    future_dates = forecast_dates_for(last_date, days, interval)
+
+    def generate():
+        yield sse_event("meta", {
+            "ticker": ticker,
+            "current_price": float(current_price),
+            "last_updated": last_date.strftime(date_format(interval)),
+            "prediction_horizon": horizon_label(days, interval),
+            "interval": interval,
+            "history_dates": history_df['Date'].tolist(),
+            "history_prices": history_df['Close'].to_numpy(dtype='float64'),
+            "forecast_dates": future_dates,
+        })
 
-        if not positions or not isinstance(positions, list):
-            return jsonify({"error": "Request must include 'positions' as a non-empty list."}), 400
+        future_predictions = []
+        try:
+            for step, price in enumerate(iter_recursive_forecast(model, input_features, days=days)):
+                check_deadline()
+                future_predictions.append(price)
+                yield sse_event("forecast", {
+                    "step": step + 1,
+                    "date": future_dates[step],
+                    "price": price,
+                    "change_pct": round((price - current_price) / current_price * 100, 2),
+                })
+
+            signal, reason = generate_recommendation(current_price, future_predictions, horizon_text(days, interval))
+            yield sse_event("summary", {
+                "forecast_prices": future_predictions,
+                "recommendation": recommendation_payload(signal, reason),
+                "model_info": {
+                    "algorithm": "Random Forest Regressor",
+                    "model_source": model_source,
+                    "features": bundle["feature_names"],
+                },
+            })
+        except DeadlineExceeded as e:
+            # Status 200 sudah terkirim: timeout tetap dicatat di statistik lane
+            LANES[e.lane].record_timeout()
+            yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {"error": "Internal Server Error", "details": str(e)})
 
-        summary = {}
-        total_current_value = 0.0
-        dates = None
-        per_ticker = {}
+    return sse_response(generate())
 
-        for pos in positions:
-            ticker = pos.get('ticker')
-            amount = float(pos.get('amount', 0) or 0)
 
-            if not ticker or amount <= 0:
-                return jsonify({"error": "Each position must include a valid 'ticker' and positive 'amount'.", "position": pos}), 400
+class PortfolioError(Exception):
+    """Request / data portfolio tidak valid -> response 400."""
 
-            input_features, current_price, last_date, history_df = get_latest_market_data_from_csv(ticker, DATA_PATH)
-            if input_features is None:
-                return jsonify({"error": f"Ticker {ticker} not found in data."}), 400
+    def __init__(self, message, position=None):
+        super().__init__(message)
+        self.position = position
 
-            
-            shares = float(amount) / float(current_price) if float(current_price) > 0 else 0.0
+    def to_dict(self):
+        body = {"error": str(self)}
+        if self.position is not None:
+            body["position"] = self.position
+        return body
 
-            
-            safe_ticker = ticker.replace('.', '_')
-            model_path = os.path.join(MODEL_DIR, f"model_{safe_ticker}.pkl")
-
-            if os.path.exists(model_path):
-                model = joblib.load(model_path)
-                forecast_prices, forecast_dates = recursive_forecast(model, input_features, current_price, last_date, days=days)
-            else:
-                
-                hist_prices = history_df['Close'].astype(float).tolist()
-                if len(hist_prices) >= 2:
-                    import numpy as _np
-                    x = _np.arange(len(hist_prices))
-                    y = _np.array(hist_prices)
-                    coeff = _np.polyfit(x, y, 1)
-                    slope = coeff[0]
-                    forecast_prices = []
-                    for i in range(1, days + 1):
-                        forecast_val = y[-1] + slope * i
-                        forecast_prices.append(round(float(forecast_val), 0))
-                else:
-                    forecast_prices = [round(current_price, 0)] * days
-
-                forecast_dates = [(last_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, days + 1)]
-
-            # Per-day value for this position
-            forecast_values = [round(shares * float(p), 2) for p in forecast_prices]
-            current_value = round(shares * float(current_price), 2)
-            total_current_value += current_value
-
-            per_ticker[ticker] = {
-                'ticker': ticker,
-                'investment': round(amount, 2),
-                'shares': round(shares, 8),
-                'current_price': float(current_price),
-                'current_value': current_value,
-                'forecast_dates': forecast_dates,
-                'forecast_prices': [float(p) for p in forecast_prices],
-                'forecast_values': forecast_values
-            }
+def parse_portfolio_request(payload):
+    positions = payload.get('positions', [])
+    try:
+        days = parse_days(payload.get('days', 7))
+    except ValueError as e:
+        raise PortfolioError(str(e))
 
-            dates = forecast_dates
+    if not positions or not isinstance(positions, list):
+        raise PortfolioError("Request must include 'positions' as a non-empty list.")
 
-        
-        total_per_day = [0.0 for _ in range(days)]
-        for t in per_ticker.values():
-            for i, v in enumerate(t['forecast_values']):
-                total_per_day[i] += v
+    for pos in positions:
+        ticker = pos.get('ticker')
+        amount = float(pos.get('amount', 0) or 0)
+        if not ticker or amount <= 0:
+            raise PortfolioError("Each position must include a valid 'ticker' and positive 'amount'.", position=pos)
 
-        total_projected_end = total_per_day[-1] if total_per_day else total_current_value
-        total_change = round(total_projected_end - total_current_value, 2)
-        total_change_pct = round((total_change / total_current_value * 100) if total_current_value > 0 else 0.0, 2)
+    return positions, days
 
-        daily_breakdown = [{'date': d, 'total': round(v, 2)} for d, v in zip(dates, total_per_day)]
+def forecast_position(pos, days, compact=False):
+    """Forecast satu posisi portfolio. Return (entry, forecast_dates)."""
+    ticker = pos.get('ticker')
+    amount = float(pos.get('amount', 0) or 0)
 
-        
-        daily_breakdown_horizontal = {
-            'dates': dates,
-            'totals': [round(v, 2) for v in total_per_day]
-        }
+    bundle, model_source = resolve_model(ticker)
+    feature_names = bundle["feature_names"] if bundle else None
 
+    input_features, current_price, last_date, history_df = get_latest_market_data_from_csv(
+        ticker, DATA_PATH, feature_names=feature_names
+    )
+    if input_features is None:
+        raise PortfolioError(f"Ticker {ticker} not found in data.")
+
+    
+    shares = float(amount) / float(current_price) if float(current_price) > 0 else 0.0
+
+    if bundle is not None:
+        model = build_predictor(bundle, model_source, ticker, input_features)
+        forecast_prices, forecast_dates = recursive_forecast(model, input_features, current_price, last_date, days=days)
+    else:
         
-        try:
-            print('\n' + '='*60)
-            print('PORTFOLIO SUMMARY')
-            print(f"  Total Investasi Saat Ini: Rp {total_current_value:,.2f}")
-            print(f"  Estimasi Total (akhir {days} hari): Rp {total_projected_end:,.2f}")
-            print(f"  Return (Rp): {total_change:,.2f}  |  Percent: {total_change_pct:+.2f}%")
+        y = history_df['Close'].to_numpy(dtype='float64')
+        if len(y) >= 2:
+            slope = np.polyfit(np.arange(len(y)), y, 1)[0]
+            forecast_prices = np.round(y[-1] + slope * np.arange(1, days + 1), 0)
+        else:
+            forecast_prices = np.full(days, round(current_price, 0))
+
+        forecast_dates = forecast_dates_for(last_date, days)
+
+    # Per-day value for this position
+    forecast_prices = np.asarray(forecast_prices, dtype='float64')
+    forecast_values = np.round(shares * forecast_prices, 2)
+
+    entry = {
+        'ticker': ticker,
+        'investment': round(amount, 2),
+        'shares': round(shares, 8),
+        'current_price': float(current_price),
+        'current_value': round(shares * float(current_price), 2),
+        'forecast_prices': forecast_prices,
+        'forecast_values': forecast_values
+    }
+    if not compact:
+        entry['forecast_dates'] = forecast_dates
+
+    return entry, forecast_dates
+
+def iter_portfolio(positions, days, compact=False):
+    """Menghasilkan (entry, forecast_dates) per posisi segera setelah dihitung."""
+    for pos in positions:
+        check_deadline()
+        yield forecast_position(pos, days, compact)
+
+def summarize_portfolio(entries, days, dates, compact=False):
+    per_ticker = {e['ticker']: e for e in entries}
+    total_current_value = sum(e['current_value'] for e in per_ticker.values())
 
-            print('\nDAILY BREAKDOWN (horizontal, chunked)')
-            dates = daily_breakdown_horizontal['dates']
-            totals = daily_breakdown_horizontal['totals']
+    
+    total_per_day = np.sum([t['forecast_values'] for t in per_ticker.values()], axis=0)
 
-            
-            chunk_size = 6
-            lines = []
-            for i in range(0, len(dates), chunk_size):
-                d_chunk = dates[i:i+chunk_size]
-                t_chunk = totals[i:i+chunk_size]
-                dates_line = ' | '.join(d_chunk)
-                values_line = ' | '.join([f"Rp {v:,.2f}" for v in t_chunk])
-                print('Dates : ' + dates_line)
-                print('Totals: ' + values_line)
+    total_projected_end = float(total_per_day[-1]) if len(total_per_day) else total_current_value
+    total_change = round(total_projected_end - total_current_value, 2)
+    total_change_pct = round((total_change / total_current_value * 100) if total_current_value > 0 else 0.0, 2)
 
-                
-                lines.append(('Dates : ' + dates_line, 'Totals: ' + values_line))
+    daily_breakdown_horizontal = {
+        'dates': dates,
+        'totals': np.round(total_per_day, 2)
+    }
 
-            print('='*60 + '\n')
+    
+    try:
+        print('\n' + '='*60)
+        print('PORTFOLIO SUMMARY')
+        print(f"  Total Investasi Saat Ini: Rp {total_current_value:,.2f}")
+        print(f"  Estimasi Total (akhir {days} hari): Rp {total_projected_end:,.2f}")
+        print(f"  Return (Rp): {total_change:,.2f}  |  Percent: {total_change_pct:+.2f}%")
+
+        print('\nDAILY BREAKDOWN (horizontal, chunked)')
+        totals = daily_breakdown_horizontal['totals'].tolist()
+
+        
+        chunk_size = 6
+        lines = []
+        for i in range(0, len(dates), chunk_size):
+            d_chunk = dates[i:i+chunk_size]
+            t_chunk = totals[i:i+chunk_size]
+            dates_line = ' | '.join(d_chunk)
+            values_line = ' | '.join([f"Rp {v:,.2f}" for v in t_chunk])
+            print('Dates : ' + dates_line)
+            print('Totals: ' + values_line)
 
             
-            parts = []
-            for dl, vl in lines:
-                parts.append(dl)
-                parts.append(vl)
-            daily_str = '\n'.join(parts)
-        except Exception:
-            
-            daily_str = ''
-            pass
+            lines.append(('Dates : ' + dates_line, 'Totals: ' + values_line))
+
+        print('='*60 + '\n')
+
+        
+        parts = []
+        for dl, vl in lines:
+            parts.append(dl)
+            parts.append(vl)
+        daily_str = '\n'.join(parts)
+    except Exception:
+        
+        daily_str = ''
+        pass
+
+    response = {
+        'meta': {
+            'days': days,
+            'total_current': round(total_current_value, 2),
+            'total_projected_end': round(total_projected_end, 2),
+            'total_change': total_change,
+            'total_change_pct': total_change_pct
+        },
+        'positions': list(per_ticker.values()),
+        'daily_breakdown_horizontal': daily_breakdown_horizontal
+    }
+    if not compact:
+        response['daily_breakdown'] = [
+            {'date': d, 'total': v} for d, v in zip(dates, daily_breakdown_horizontal['totals'].tolist())
+        ]
+        response['daily_breakdown_str'] = daily_str
 
-        response = {
-            'meta': {
-                'days': days,
-                'total_current': round(total_current_value, 2),
-                'total_projected_end': round(total_projected_end, 2),
-                'total_change': total_change,
-                'total_change_pct': total_change_pct
-            },
-            'positions': list(per_ticker.values()),
-            'daily_breakdown': daily_breakdown,
-            'daily_breakdown_horizontal': daily_breakdown_horizontal,
-            'daily_breakdown_str': daily_str
-        }
+    return response
+
+@app.route('/portfolio', methods=['POST'])
+@admit("portfolio")
+def portfolio():
+    """API endpoint to evaluate a portfolio over the next N days.
+    Request JSON: { "positions": [{"ticker": "BBRI.JK", "amount": 1000000}, ...], "days": 7 }
+    Response: daily breakdown + per-ticker forecasts and summary totals
+    """
+    try:
+        payload = request.get_json() or {}
+        positions, days = parse_portfolio_request(payload)
+
+        # compact: tanpa daily_breakdown / daily_breakdown_str / forecast_dates per posisi
+        compact = wants_compact(payload)
 
-        return jsonify(response)
+        entries = []
+        dates = None
+        for entry, forecast_dates in iter_portfolio(positions, days, compact):
+            entries.append(entry)
+            dates = forecast_dates
 
+        return json_response(summarize_portfolio(entries, days, dates, compact))
+
+    except PortfolioError as e:
+        return jsonify(e.to_dict()), 400
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
 
 
+@app.route('/portfolio/stream', methods=['POST'])
+@admit("portfolio")
+def portfolio_stream():
+    """Versi streaming /portfolio (Server-Sent Events).
+    Event: start -> position + totals (per ticker, segera setelah dihitung) -> summary.
+    Jika gagal di tengah jalan, dikirim event error lalu stream ditutup.
+    """
+    payload = request.get_json() or {}
+    try:
+        positions, days = parse_portfolio_request(payload)
+    except PortfolioError as e:
+        return jsonify(e.to_dict()), 400
+    compact = wants_compact(payload)
+
+    def generate():
+        # Byte pertama dikirim sebelum komputasi apa pun
+        yield sse_event("start", {"positions": len(positions), "days": days})
+
+        entries = []
+        dates = None
+        running = np.zeros(days)
+        try:
+            for entry, forecast_dates in iter_portfolio(positions, days, compact):
+                entries.append(entry)
+                dates = forecast_dates
+                running += entry['forecast_values']
+
+                yield sse_event("position", entry)
+                yield sse_event("totals", {
+                    "completed": len(entries),
+                    "total_current": round(sum(e['current_value'] for e in entries), 2),
+                    "dates": dates,
+                    "totals": np.round(running, 2),
+                })
+
+            # Posisi sudah dikirim satu per satu, tidak perlu diulang di summary
+            summary = summarize_portfolio(entries, days, dates, compact=True)
+            summary.pop('positions')
+            yield sse_event("summary", summary)
+        except PortfolioError as e:
+            yield sse_event("error", e.to_dict())
+        except DeadlineExceeded as e:
+            # Status 200 sudah terkirim: timeout tetap dicatat di statistik lane
+            LANES[e.lane].record_timeout()
+            yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {'error': 'Internal Server Error', 'details': str(e)})
+
+    return sse_response(generate())
+
+
+def available_tickers_payload(snapshot):
+    ticker_info = []
+    for ticker in snapshot["tickers"]:
+        source = model_source_for(ticker)
+        model_exists = source is not None
+        
+        model = None
+        if source is not None:
+            filename = GLOBAL_MODEL_FILENAME if source == "global" else model_filename(ticker)
+            info = snapshot["models"].get(filename) or {}
+            model = {
+                "source": source,
+                "trained_at": info.get("trained_at"),
+                "size_bytes": info.get("size"),
+                "params": info.get("params"),
+                "metrics": info.get("metrics"),
+            }
+            if source == "global" and info.get("metrics"):
+                model["metrics"] = info["metrics"].get("per_ticker", {}).get(ticker, info["metrics"])
+        
+        ticker_info.append({
+            "ticker": ticker,
+            "model_available": model_exists,
+            "status": "✅ Ready" if model_exists else "⚠️ Need Training",
+            "data": snapshot["data"][ticker],
+            "model": model,
+            "intervals": [iv for iv in INTERVALS if model_source_for(ticker, iv) is not None],
+        })
+    
+    return {
+        "total_tickers": len(ticker_info),
+        "tickers": ticker_info,
+        "csv_path": DATA_PATH,
+        "data_updated_at": snapshot["data_updated_at"],
+    }
+
 @app.route('/available-tickers', methods=['GET'])
 def available_tickers():
     
     try:
-        if not os.path.exists(DATA_PATH):
+        snapshot = catalog.snapshot()
+        if snapshot["data_updated_at"] is None:
             return jsonify({"error": f"CSV tidak ditemukan: {DATA_PATH}"}), 404
         
-        df = pd.read_csv(DATA_PATH)
-        tickers = df['Ticker'].unique().tolist()
+        # Payload hanya dibangun ulang jika snapshot catalog berubah
+        if _available_cache["version"] != snapshot["version"]:
+            _available_cache["payload"] = available_tickers_payload(snapshot)
+            _available_cache["version"] = snapshot["version"]
         
-        # Cek model availability
-        ticker_info = []
-        for ticker in tickers:
-            safe_ticker = ticker.replace(".", "_")
-            model_path = os.path.join(MODEL_DIR, f"model_{safe_ticker}.pkl")
-            model_exists = os.path.exists(model_path)
-            
-            ticker_info.append({
-                "ticker": ticker,
-                "model_available": model_exists,
-                "status": "✅ Ready" if model_exists else "⚠️ Need Training"
-            })
-        
-        return jsonify({
-            "total_tickers": len(tickers),
-            "tickers": ticker_info,
-            "csv_path": DATA_PATH
-        })
+        return json_response(_available_cache["payload"])
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -504,7 +784,8 @@ if __name__ == '__main__':
         print(f"⚠️  WARNING: CSV file not found at {DATA_PATH}")
         print(f"   Run training pipeline first: python main_flow.py\n")
     else:
-        df = pd.read_csv(DATA_PATH)
-        print(f"✅ CSV loaded: {len(df)} rows, {df['Ticker'].nunique()} tickers\n")
+        snapshot = catalog.refresh(force=True)
+        total_rows = sum(info["rows"] for info in snapshot["data"].values())
+        print(f"✅ CSV loaded: {total_rows} rows, {len(snapshot['tickers'])} tickers\n")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Sinkronisasi artifact (model + data) berbasis manifest content-addressed.
+
+Manifest mencatat sha256 + ukuran per file model dan per partisi data.
+Pull/push hanya memindahkan object yang hash-nya berbeda dari state lokal,
+secara paralel, dan setiap download diverifikasi sebelum menggantikan file.
+
+    python -m src.artifact_sync status --remote /path/ke/remote
+    python -m src.artifact_sync push   --remote /path/ke/remote
+    python -m src.artifact_sync pull   --remote /path/ke/remote
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_PATH = "artifacts.manifest.json"
+STATE_PATH = ".artifact_state.json"
+MANIFEST_VERSION = 1
+
+# File tunggal atau direktori (semua file di dalamnya ikut dilacak)
+# data/raw: satu file bar per interval (stock_data.csv, stock_data_1h.csv, ...)
+TRACKED_PATHS = ["models", "data/raw"]
+DATA_PATHS = ["data/raw"]
+# File metadata (pointer DVC, .gitignore) dan file sementara tidak ikut disync
+_IGNORED_SUFFIXES = (".tmp", ".dvc")
+
+DEFAULT_WORKERS = 8
+_CHUNK = 1024 * 1024
+
+
+class SyncError(Exception):
+    pass
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def iter_tracked_files(root=".", paths=None):
+    """Path relatif (format posix) dari semua file yang dilacak."""
+    for tracked in paths or TRACKED_PATHS:
+        full = os.path.join(root, tracked)
+        if os.path.isfile(full):
+            yield tracked.replace(os.sep, "/")
+        elif os.path.isdir(full):
+            for dirpath, _, filenames in os.walk(full):
+                for name in sorted(filenames):
+                    if name.startswith(".") or name.endswith(_IGNORED_SUFFIXES):
+                        continue
+                    rel = os.path.relpath(os.path.join(dirpath, name), root)
+                    yield rel.replace(os.sep, "/")
+
+
+class LocalState:
+    """
+    Cache hash file lokal berdasarkan (size, mtime) supaya file yang tidak
+    berubah tidak perlu di-hash ulang setiap sync.
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+        self.path = os.path.join(root, STATE_PATH)
+        self.entries = (_read_json(self.path) or {}).get("files", {})
+
+    def hash_of(self, rel_path):
+        full = os.path.join(self.root, rel_path)
+        if not os.path.isfile(full):
+            return None
+        st = os.stat(full)
+        cached = self.entries.get(rel_path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+
+        sha = sha256_file(full)
+        self.entries[rel_path] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        return sha
+
+    def save(self):
+        _write_json(self.path, {"files": self.entries})
+
+
+def build_manifest(root=".", paths=None, state=None):
+    state = state or LocalState(root)
+    files = {}
+    for rel_path in iter_tracked_files(root, paths):
+        files[rel_path] = {
+            "sha256": state.hash_of(rel_path),
+            "size": os.path.getsize(os.path.join(root, rel_path)),
+        }
+    state.save()
+    return {"version": MANIFEST_VERSION, "algorithm": "sha256", "files": files}
+
+
+def _matches(rel_path, paths):
+    if paths is None:
+        return True
+    return any(rel_path == p or rel_path.startswith(p.rstrip("/") + "/") for p in paths)
+
+
+def diff_manifest(manifest, root=".", paths=None, state=None):
+    """File di manifest yang tidak ada / berbeda di lokal -> {rel_path: entry}."""
+    state = state or LocalState(root)
+    changed = {
+        rel_path: entry
+        for rel_path, entry in manifest["files"].items()
+        if _matches(rel_path, paths) and state.hash_of(rel_path) != entry["sha256"]
+    }
+    state.save()
+    return changed
+
+
+class LocalDirRemote:
+    """
+    Remote berupa direktori biasa (disk lokal / network mount), dengan layout
+    content-addressed: objects/<2 huruf awal sha>/<sha>. Dipakai juga sebagai
+    pengganti Google Drive saat testing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _object_path(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], sha)
+
+    def has(self, sha):
+        return os.path.exists(self._object_path(sha))
+
+    def get(self, sha, dest_path):
+        shutil.copyfile(self._object_path(sha), dest_path)
+
+    def put(self, src_path, sha):
+        path = self._object_path(sha)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Temp unik: upload paralel object yang sama tidak saling menimpa
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{sha}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def read_manifest(self):
+        return _read_json(os.path.join(self.root, MANIFEST_PATH))
+
+    def write_manifest(self, manifest):
+        _write_json(os.path.join(self.root, MANIFEST_PATH), manifest)
+
+
+def remote_from_url(url):
+    if url.startswith("file://"):
+        return LocalDirRemote(url[len("file://"):])
+    if "://" not in url:
+        return LocalDirRemote(url)
+    raise SyncError(f"Remote belum didukung: {url}")
+
+
+def _fetch(remote, root, rel_path, entry):
+    dest = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".tmp")
+    os.close(fd)
+    try:
+        remote.get(entry["sha256"], tmp_path)
+        actual = sha256_file(tmp_path)
+        if actual != entry["sha256"]:
+            raise SyncError(f"Verifikasi gagal untuk {rel_path}: {actual} != {entry['sha256']}")
+        os.replace(tmp_path, dest)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rel_path
+
+
+def pull(remote, root=".", paths=None, manifest=None, workers=DEFAULT_WORKERS):
+    """
+    Mengambil hanya file yang berbeda dari manifest (default: manifest remote).
+    Return daftar file yang di-download.
+    """
+    manifest = manifest or remote.read_manifest()
+    if manifest is None:
+        raise SyncError("Manifest tidak ditemukan di remote.")
+
+    changed = diff_manifest(manifest, root, paths)
+    if not changed:
+        print("✅ [SYNC] Semua artifact lokal sudah up-to-date.")
+        return []
+
+    size = sum(entry["size"] for entry in changed.values())
+    print(f"⬇️  [SYNC] Mengambil {len(changed)} file ({size / 1024 ** 2:.1f} MB) dari remote...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fetched = list(pool.map(lambda item: _fetch(remote, root, *item), changed.items()))
+
+    # Rekam hash file yang baru diambil supaya sync berikutnya tidak hash ulang
+    state = LocalState(root)
+    for rel_path in fetched:
+        state.hash_of(rel_path)
+    state.save()
+
+    print(f"✅ [SYNC] {len(fetched)} file diperbarui & terverifikasi.")
+    return fetched
+
+
+def push(remote, root=".", paths=None, workers=DEFAULT_WORKERS):
+    """
+    Upload object yang belum ada di remote, lalu tulis manifest baru
+    (di remote dan di MANIFEST_PATH lokal). Return daftar file yang di-upload.
+    Dengan `paths`, hanya entry di bawah paths tersebut yang diganti; entry
+    lain di manifest remote dipertahankan.
+    """
+    local = build_manifest(root, paths)
+    missing = [
+        (rel_path, entry) for rel_path, entry in local["files"].items()
+        if not remote.has(entry["sha256"])
+    ]
+    # File dengan isi identik cukup di-upload sekali (object per sha)
+    uploads = list({entry["sha256"]: (rel_path, entry) for rel_path, entry in missing}.values())
+
+    manifest = local
+    previous = remote.read_manifest() if paths is not None else None
+    if previous is not None:
+        files = {
+            rel_path: entry for rel_path, entry in previous["files"].items()
+            if not _matches(rel_path, paths)
+        }
+        files.update(local["files"])
+        manifest = dict(local, files=files)
+
+    print(f"⬆️  [SYNC] Upload {len(uploads)} object untuk {len(missing)} dari {len(local['files'])} file...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(
+            lambda item: remote.put(os.path.join(root, item[0]), item[1]["sha256"]),
+            uploads,
+        ))
+
+    remote.write_manifest(manifest)
+    _write_json(os.path.join(root, MANIFEST_PATH), manifest)
+    print(f"✅ [SYNC] Manifest tersimpan ({len(manifest['files'])} file).")
+    return [rel_path for rel_path, _ in missing]
+
+
+def status(remote, root=".", paths=None):
+    manifest = remote.read_manifest()
+    if manifest is None:
+        raise SyncError("Manifest tidak ditemukan di remote.")
+    return diff_manifest(manifest, root, paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["manifest", "status", "push", "pull"])
+    parser.add_argument("--remote", default=os.getenv("ARTIFACT_REMOTE"))
+    parser.add_argument("--root", default=".")
+    parser.add_argument("--paths", nargs="+", default=None, help="Batasi ke path tertentu (default: semua)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    if args.command == "manifest":
+        manifest = build_manifest(args.root, args.paths)
+        _write_json(os.path.join(args.root, MANIFEST_PATH), manifest)
+        print(f"Manifest tersimpan: {MANIFEST_PATH} ({len(manifest['files'])} file)")
+        return
+
+    if not args.remote:
+        parser.error("--remote (atau env ARTIFACT_REMOTE) wajib diisi")
+    remote = remote_from_url(args.remote)
+
+    if args.command == "status":
+        changed = status(remote, args.root, args.paths)
+        for rel_path, entry in sorted(changed.items()):
+            print(f"  berubah: {rel_path} ({entry['size']} bytes)")
+        print(f"{len(changed)} file berbeda dari remote.")
+    elif args.command == "push":
+        push(remote, args.root, args.paths, workers=args.workers)
+    elif args.command == "pull":
+        pull(remote, args.root, args.paths, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import numpy as np
+import pandas as pd
+
+from src.trading_calendar import get_calendar
+
+DEFAULT_INTERVAL = "1d"
+DEFAULT_DATA_PATH = "data/raw/stock_data.csv"
+
+# Interval yang didukung (notasi yfinance). max_days/chunk_days mengikuti
+# batas yfinance: bar 1m hanya tersedia 30 hari terakhir, maksimal 7 hari per
+# request; bar < 1h hanya 60 hari terakhir; bar 1h 730 hari terakhir.
+INTERVALS = {
+    "1m": {"minutes": 1, "max_days": 29, "chunk_days": 7},
+    "5m": {"minutes": 5, "max_days": 59, "chunk_days": 59},
+    "15m": {"minutes": 15, "max_days": 59, "chunk_days": 59},
+    "30m": {"minutes": 30, "max_days": 59, "chunk_days": 59},
+    "1h": {"minutes": 60, "max_days": 729, "chunk_days": 729},
+    "1d": {"minutes": 1440, "max_days": 5 * 365, "chunk_days": 5 * 365},
+}
+
+# Timestamp bar disimpan sebagai waktu lokal bursa (tanpa timezone)
+MARKET_TZ = "Asia/Jakarta"
+
+# Sesi perdagangan BEI (waktu Jakarta), dipakai untuk memproyeksikan bar intraday
+SESSION_OPEN = "09:00"
+SESSION_CLOSE = "16:00"
+
+# Kolom file bar mentah (format sama dengan data/raw/stock_data.csv)
+BAR_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume', 'Dividends', 'Stock Splits', 'Ticker']
+_RESAMPLE_AGG = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Adj Close': 'last',
+    'Volume': 'sum',
+    'Dividends': 'sum',
+    'Stock Splits': 'max',
+}
+
+# Jumlah baris per chunk saat membaca CSV bar (memori ~ chunk, bukan file)
+BAR_CHUNK_ROWS = int(os.getenv("BAR_CHUNK_ROWS", 500_000))
+
+
+def validate_interval(interval):
+    if interval not in INTERVALS:
+        raise ValueError(f"Interval tidak didukung: {interval} (pilihan: {', '.join(INTERVALS)})")
+    return interval
+
+
+def is_intraday(interval):
+    return INTERVALS[validate_interval(interval)]["minutes"] < INTERVALS[DEFAULT_INTERVAL]["minutes"]
+
+
+def date_format(interval):
+    return '%Y-%m-%d %H:%M' if is_intraday(interval) else '%Y-%m-%d'
+
+
+def horizon_text(steps, interval=DEFAULT_INTERVAL):
+    """Teks horizon forecast untuk rekomendasi: '7 hari bursa' / '7 bar 15m'."""
+    return f"{steps} bar {interval}" if is_intraday(interval) else f"{steps} hari bursa"
+
+
+def data_path_for(interval, base_path=DEFAULT_DATA_PATH):
+    """'1d' -> base_path, lainnya -> <base>_<interval>.csv (satu file per interval)."""
+    validate_interval(interval)
+    if interval == DEFAULT_INTERVAL:
+        return base_path
+    stem, ext = os.path.splitext(base_path)
+    return f"{stem}_{interval}{ext}"
+
+
+def resolve_source(interval, base_path=DEFAULT_DATA_PATH):
+    """
+    Return (data_path, resample_to). Jika file untuk interval tersebut ada,
+    dipakai apa adanya (resample_to=None). Jika tidak, dipakai file interval
+    lebih halus yang tersimpan (yang paling kasar, supaya baris paling sedikit)
+    dan di-resample on-the-fly ke interval yang diminta.
+    """
+    native = data_path_for(interval, base_path)
+    if os.path.exists(native):
+        return native, None
+
+    target = INTERVALS[interval]["minutes"]
+    finer = [
+        name for name, spec in INTERVALS.items()
+        if spec["minutes"] < target and target % spec["minutes"] == 0
+        and os.path.exists(data_path_for(name, base_path))
+    ]
+    if finer:
+        source = max(finer, key=lambda name: INTERVALS[name]["minutes"])
+        return data_path_for(source, base_path), interval
+    return native, None
+
+
+def downcast_bars(df):
+    """float64/int64 -> float32 (harga & volume), Ticker -> category."""
+    dtypes = {col: 'float32' for col in df.select_dtypes(include=['float64', 'int64']).columns}
+    if 'Ticker' in df.columns:
+        dtypes['Ticker'] = 'category'
+    return df.astype(dtypes)
+
+
+def read_bars(data_path, tickers=None, chunksize=BAR_CHUNK_ROWS):
+    """
+    Membaca CSV bar per chunk: hanya baris ticker yang diminta yang disimpan
+    (sudah di-downcast), jadi memori sebanding dengan data ticker tersebut,
+    bukan ukuran file. Return (df, semua_ticker_di_file).
+    """
+    wanted = set(tickers) if tickers is not None else None
+    parts = []
+    all_tickers = set()
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        all_tickers.update(chunk['Ticker'].unique().tolist())
+        if wanted is not None:
+            chunk = chunk[chunk['Ticker'].isin(wanted)]
+        if chunk.empty:
+            continue
+        parts.append(downcast_bars(chunk.assign(Date=pd.to_datetime(chunk['Date']))))
+
+    if not parts:
+        return pd.DataFrame(columns=BAR_COLUMNS), sorted(all_tickers)
+
+    df = pd.concat(parts, ignore_index=True)
+    df['Ticker'] = df['Ticker'].astype('category')
+    return df, sorted(all_tickers)
+
+
+def ticker_row_counts(data_path, chunksize=BAR_CHUNK_ROWS):
+    """Jumlah baris per ticker (hanya kolom Ticker yang dibaca)."""
+    counts = {}
+    for chunk in pd.read_csv(data_path, usecols=['Ticker'], chunksize=chunksize):
+        for ticker, n in chunk['Ticker'].value_counts().items():
+            counts[ticker] = counts.get(ticker, 0) + int(n)
+    return counts
+
+
+def iter_ticker_bars(data_path, tickers=None, chunksize=BAR_CHUNK_ROWS, counts=None):
+    """
+    Yield (ticker, df_ticker) satu per satu, urut tanggal. Ticker dibaca per
+    batch berisi maksimal `chunksize` baris, jadi memori dibatasi oleh batch
+    (atau satu ticker jika historinya lebih panjang), bukan ukuran file.
+    counts: hasil ticker_row_counts jika sudah ada (hemat satu pass).
+    """
+    counts = counts if counts is not None else ticker_row_counts(data_path, chunksize)
+    wanted = [t for t in (tickers if tickers is not None else sorted(counts)) if t in counts]
+
+    batch, batch_rows = [], 0
+    batches = []
+    for ticker in wanted:
+        if batch and batch_rows + counts[ticker] > chunksize:
+            batches.append(batch)
+            batch, batch_rows = [], 0
+        batch.append(ticker)
+        batch_rows += counts[ticker]
+    if batch:
+        batches.append(batch)
+
+    for batch in batches:
+        df, _ = read_bars(data_path, batch, chunksize)
+        for ticker, df_ticker in df.groupby('Ticker', observed=True, sort=False):
+            yield ticker, df_ticker.sort_values('Date').reset_index(drop=True)
+        del df
+
+
+def latest_dates(data_path, chunksize=BAR_CHUNK_ROWS):
+    """Tanggal bar terakhir per ticker (hanya kolom Date & Ticker yang dibaca)."""
+    latest = {}
+    if not os.path.exists(data_path):
+        return latest
+    for chunk in pd.read_csv(data_path, usecols=['Date', 'Ticker'], chunksize=chunksize):
+        chunk_max = pd.to_datetime(chunk['Date']).groupby(chunk['Ticker']).max()
+        for ticker, date in chunk_max.items():
+            if ticker not in latest or date > latest[ticker]:
+                latest[ticker] = date
+    return latest
+
+
+def resample_bars(df_ticker, interval):
+    """Agregasi OHLCV satu ticker ke interval yang lebih kasar (bin kosong dibuang)."""
+    rule = "1D" if interval == DEFAULT_INTERVAL else f"{INTERVALS[validate_interval(interval)]['minutes']}min"
+    agg = {col: how for col, how in _RESAMPLE_AGG.items() if col in df_ticker.columns}
+    resampled = (
+        df_ticker.sort_values('Date')
+        .resample(rule, on='Date', label='left', closed='left')
+        .agg(agg)
+        .dropna(subset=['Close'])
+        .reset_index()
+    )
+    if 'Ticker' in df_ticker.columns and len(df_ticker):
+        resampled['Ticker'] = df_ticker['Ticker'].iloc[0]
+    return downcast_bars(resampled)
+
+
+def subsample_indices(n_rows, max_rows=None, recent_fraction=0.5):
+    """
+    Index baris untuk training dengan memori terbatas: bagian terbaru
+    (recent_fraction dari max_rows) diambil utuh, histori lebih lama diambil
+    merata (stride) untuk sisanya. Urutan waktu tetap terjaga.
+    """
+    if max_rows is None or n_rows <= max_rows:
+        return np.arange(n_rows)
+    recent = int(max_rows * recent_fraction)
+    older = np.linspace(0, n_rows - recent - 1, max_rows - recent).round().astype(int)
+    return np.unique(np.concatenate([older, np.arange(n_rows - recent, n_rows)]))
+
+
+def next_timestamps(last_date, steps, interval):
+    """
+    Timestamp bar intraday berikutnya di dalam sesi perdagangan: setelah
+    SESSION_CLOSE lanjut ke SESSION_OPEN hari bursa berikutnya (akhir pekan
+    dan hari libur BEI dilewati, lihat src/trading_calendar.py).
+    """
+    minutes = INTERVALS[validate_interval(interval)]["minutes"]
+    return get_calendar().next_intraday(last_date, steps, minutes, SESSION_OPEN, SESSION_CLOSE)
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+import pandas as pd
+from src.model_registry import read_sidecar
+
+# Jeda minimum antar pengecekan stat (detik). Di antara itu semua lookup
+# dilayani dari snapshot di memori tanpa I/O sama sekali.
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", 2))
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _scan_data(data_path):
+    """Ringkasan per ticker: jumlah baris + rentang tanggal (hanya kolom Date & Ticker)."""
+    df = pd.read_csv(data_path, usecols=['Date', 'Ticker'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    summary = df.groupby('Ticker')['Date'].agg(['count', 'min', 'max'])
+    return {
+        ticker: {
+            "rows": int(row['count']),
+            "first_date": row['min'].strftime('%Y-%m-%d'),
+            "last_date": row['max'].strftime('%Y-%m-%d'),
+        }
+        for ticker, row in summary.iterrows()
+    }
+
+
+def _model_entry(path, stat):
+    size, mtime_ns = stat
+    entry = {
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "trained_at": pd.Timestamp(mtime_ns, unit='ns').strftime('%Y-%m-%d %H:%M:%S'),
+        "params": None,
+        "metrics": None,
+        "fallback": None,
+    }
+    meta = read_sidecar(path)
+    if meta is not None:
+        entry["params"] = meta.get("params")
+        entry["metrics"] = meta.get("metrics")
+        entry["fallback"] = meta.get("fallback")
+        entry["kind"] = meta.get("kind", "per_ticker")
+    return entry
+
+
+class Catalog:
+    """
+    Katalog ticker & model di memori. Snapshot diganti utuh (bukan diubah
+    di tempat) setiap ada perubahan file, jadi pembaca tidak perlu lock.
+    Perubahan dideteksi lewat stat polling: CSV di-scan ulang hanya jika
+    size/mtime-nya berubah, metadata model hanya untuk file yang berubah.
+    """
+
+    def __init__(self, data_path, model_dir, poll_seconds=CATALOG_POLL_SECONDS):
+        self.data_path = data_path
+        self.model_dir = model_dir
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._data_stat = None
+        self._snapshot = {
+            "version": 0,
+            "tickers": [],
+            "data": {},
+            "models": {},
+            "data_updated_at": None,
+            "refreshed_at": None,
+        }
+
+    def snapshot(self):
+        if self._snapshot["version"] == 0 or time.monotonic() - self._checked_at >= self.poll_seconds:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self, force=False):
+        # Satu thread saja yang melakukan refresh; thread lain memakai snapshot
+        # lama. Sebelum scan pertama selesai (version 0) belum ada snapshot
+        # yang layak dipakai, jadi semua thread menunggu scan tersebut.
+        cold = self._snapshot["version"] == 0
+        if not self._lock.acquire(blocking=force or cold):
+            return self._snapshot
+        try:
+            if cold and not force and self._snapshot["version"] > 0:
+                return self._snapshot  # sudah di-scan thread lain selama menunggu
+            self._checked_at = time.monotonic()
+            current = self._snapshot
+            data, data_updated_at = current["data"], current["data_updated_at"]
+            changed = current["version"] == 0
+
+            data_stat = _stat(self.data_path)
+            if force or data_stat != self._data_stat:
+                data = _scan_data(self.data_path) if data_stat else {}
+                data_updated_at = (
+                    pd.Timestamp(data_stat[1], unit='ns').strftime('%Y-%m-%d %H:%M:%S') if data_stat else None
+                )
+                self._data_stat = data_stat
+                changed = True
+
+            models = self._scan_models(current["models"], force)
+            if models is not current["models"]:
+                changed = True
+
+            if changed:
+                self._snapshot = {
+                    "version": current["version"] + 1,
+                    "tickers": sorted(data),
+                    "data": data,
+                    "models": models,
+                    "data_updated_at": data_updated_at,
+                    "refreshed_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+                }
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def _scan_models(self, previous, force):
+        try:
+            names = [
+                name for name in os.listdir(self.model_dir)
+                if name.startswith("model_") and name.endswith(".pkl")
+            ]
+        except OSError:
+            names = []
+
+        models = {}
+        changed = len(names) != len(previous)
+        for name in names:
+            path = os.path.join(self.model_dir, name)
+            stat = _stat(path)
+            if stat is None:
+                changed = True
+                continue
+            old = previous.get(name)
+            if not force and old is not None and (old["size"], old["mtime_ns"]) == stat and old["params"] is not None:
+                models[name] = old
+            else:
+                models[name] = _model_entry(path, stat)
+                changed = changed or old != models[name]
+        return models if changed else previous
+
+    # --- Lookup (tanpa I/O) ---
+
+    def tickers(self):
+        return self.snapshot()["tickers"]
+
+    def data_info(self, ticker):
+        return self.snapshot()["data"].get(ticker)
+
+    def model_info(self, filename):
+        return self.snapshot()["models"].get(filename)
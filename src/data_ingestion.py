@@ -4,6 +4,10 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 from prefect import task
+from src.bars import (
+    DEFAULT_INTERVAL, INTERVALS, BAR_COLUMNS, MARKET_TZ, validate_interval, data_path_for,
+    downcast_bars, latest_dates,
+)
 
 DEFAULT_TICKERS = ["BBRI.JK", "BMRI.JK", "BBNI.JK", "BBTN.JK", "BRIS.JK"]
 
@@ -29,12 +33,86 @@ def push_to_dvc_remote(file_path):
     
     print("="*50 + "\n")
 
+def _download_intraday(ticker, interval, since, end_date):
+    """
+    Bar intraday satu ticker sejak `since` (eksklusif). Diunduh per jendela
+    chunk_days (batas yfinance per request). Bar yang belum selesai dibuang.
+    """
+    spec = INTERVALS[interval]
+    start = end_date - timedelta(days=spec["max_days"])
+    if since is not None and since > start:
+        start = since
+
+    t = yf.Ticker(ticker)
+    frames = []
+    window_start = start
+    while window_start < end_date:
+        window_end = min(window_start + timedelta(days=spec["chunk_days"]), end_date)
+        df = t.history(start=window_start, end=window_end, interval=interval, auto_adjust=False, actions=True)
+        if not df.empty:
+            frames.append(df)
+        window_start = window_end
+
+    if not frames:
+        return None
+
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep='last')].reset_index()
+    df = df.rename(columns={'Datetime': 'Date'})
+    df['Date'] = df['Date'].dt.tz_convert(MARKET_TZ).dt.tz_localize(None)
+
+    # Bar terakhir yang masih berjalan belum final -> jangan disimpan
+    bar_length = timedelta(minutes=spec["minutes"])
+    df = df[df['Date'] + bar_length <= end_date]
+    if since is not None:
+        df = df[df['Date'] > since]
+    df['Ticker'] = ticker
+    return downcast_bars(df.reindex(columns=BAR_COLUMNS))
+
+
+def _ingest_intraday(tickers, output_path, interval):
+    """
+    Histori intraday disimpan append-only: hanya bar setelah bar terakhir
+    di file yang diunduh & ditambahkan, jadi histori terus bertambah melewati
+    batas lookback yfinance tanpa menulis ulang (atau memuat) seluruh file.
+    """
+    end_date = pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None)
+    last = latest_dates(output_path)
+
+    appended = 0
+    for ticker in tickers:
+        try:
+            df = _download_intraday(ticker, interval, last.get(ticker), end_date)
+        except Exception as e:
+            print(f"⚠️ Error downloading {ticker}: {e}")
+            continue
+        if df is None or df.empty:
+            continue
+
+        write_header = not os.path.exists(output_path)
+        df.to_csv(output_path, mode='a', header=write_header, index=False)
+        appended += len(df)
+        print(f"   {ticker}: +{len(df)} bar {interval}")
+
+    if appended == 0 and not last:
+        raise RuntimeError("Data Ingestion Gagal: Tidak ada data yang terunduh.")
+    print(f"Data tersimpan di: {output_path} (+{appended} bar)")
+
+
 @task(name="Ingest Data", retries=3, retry_delay_seconds=5)
-def ingest_task(tickers=None, output_path="data/raw/stock_data.csv"):
+def ingest_task(tickers=None, output_path=None, interval=DEFAULT_INTERVAL):
     if tickers is None:
         tickers = DEFAULT_TICKERS
+    validate_interval(interval)
+    output_path = output_path or data_path_for(interval)
         
-    print(f"📡 Memulai Ingestion untuk: {tickers}")
+    print(f"📡 Memulai Ingestion ({interval}) untuk: {tickers}")
+    
+    if interval != DEFAULT_INTERVAL:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        _ingest_intraday(tickers, output_path, interval)
+        push_to_dvc_remote(output_path)
+        return output_path
     
     end_date = datetime.today()
     start_date = end_date - timedelta(days=5*365)
@@ -0,0 +1,424 @@
+import os
+import json
+import hashlib
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from src.indicators import IndicatorEngine, BASE_FEATURES, DEFAULT_FEATURES
+from src.bars import read_bars, iter_ticker_bars, ticker_row_counts, resample_bars, subsample_indices
+
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "data/features")
+FEATURE_COLUMNS = BASE_FEATURES
+
+# Naikkan versi ini setiap kali logika build_features / IndicatorEngine berubah,
+# supaya semua cache lama otomatis dianggap basi.
+FEATURE_VERSION = 3
+
+_INDEX_FILE = "_index.json"
+
+# Cache in-memory per proses: (cache_dir, def_hash, ticker) -> (cache_key, feature_set)
+_memory_cache = {}
+
+# Satu rebuild per namespace (cache_dir, def_hash) per proses: saat CSV berubah,
+# request paralel menunggu rebuild yang sedang berjalan lalu memakai hasilnya
+_rebuild_locks = {}
+_rebuild_locks_guard = threading.Lock()
+
+
+def safe_name(ticker):
+    return ticker.replace(".", "_")
+
+
+def feature_definition_hash(feature_names=None, interval=None, source=None):
+    """
+    Hash dari definisi fitur (nama kolom + versi logika + interval resample)
+    dan file sumbernya: stock_data.csv dan stock_data_1h.csv punya namespace
+    cache sendiri, jadi tidak saling menimpa.
+    """
+    spec = {
+        "version": FEATURE_VERSION,
+        "features": list(feature_names or DEFAULT_FEATURES),
+        "interval": interval,
+        "source": os.path.abspath(source) if source else None,
+    }
+    raw = json.dumps(spec, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def source_hash(df_ticker):
+    """Hash dari baris data mentah satu ticker (urut tanggal)."""
+    cols = ['Date'] + FEATURE_COLUMNS
+    hashed = pd.util.hash_pandas_object(df_ticker[cols], index=False).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def read_raw_data(data_path, tickers=None):
+    """Bar mentah (dibaca per chunk + downcast), opsional hanya ticker tertentu."""
+    return read_bars(data_path, tickers)[0]
+
+
+def build_features(df_ticker, feature_names=None):
+    """
+    Satu-satunya tempat fitur dibentuk - dipakai training, evaluasi dan serving.
+    Return dict berisi array numpy untuk SEMUA baris (termasuk baris terakhir
+    yang target-nya NaN, dipakai sebagai input forecasting) + rolling state
+    indikator pada bar terakhir.
+    """
+    data = df_ticker.sort_values('Date').reset_index(drop=True)
+
+    engine = IndicatorEngine(feature_names)
+    features, state = engine.compute(data)
+    target = data['Close'].shift(-1)
+
+    # X disimpan float32: RandomForest sklearn memang bekerja dalam float32
+    return {
+        "X": features.to_numpy(dtype='float32'),
+        "y": target.to_numpy(dtype='float64'),
+        "dates": data['Date'].to_numpy(dtype='datetime64[ns]'),
+        "close": data['Close'].to_numpy(dtype='float64'),
+        "feature_names": engine.feature_names,
+        "state": state,
+    }
+
+
+def extend_features(feature_set, new_bars):
+    """
+    Menghitung baris fitur untuk bar baru tanpa menghitung ulang histori:
+    setiap indikator dimajukan dari rolling state tersimpan (cukup
+    feature_names + state, jadi meta cache juga bisa dipakai). Return hanya
+    baris baru (+ state baru); "last_y" adalah target baris lama terakhir
+    yang sekarang sudah diketahui. Histori lama tidak disentuh.
+    """
+    engine = IndicatorEngine(feature_set["feature_names"])
+    state = json.loads(json.dumps(feature_set["state"]))
+    new_bars = new_bars.sort_values('Date')
+
+    rows = [engine.update(state, bar) for bar in new_bars[FEATURE_COLUMNS].to_dict('records')]
+    new_close = new_bars['Close'].to_numpy(dtype='float64')
+
+    return {
+        "X": np.vstack(rows).astype('float32'),
+        "y": np.append(new_close[1:], np.nan),
+        "dates": new_bars['Date'].to_numpy(dtype='datetime64[ns]'),
+        "close": new_close,
+        "last_y": float(new_close[0]),
+        "state": state,
+    }
+
+
+def _ticker_dir(cache_dir, def_hash, ticker):
+    return os.path.join(cache_dir, def_hash, safe_name(ticker))
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _rebuild_lock(cache_dir, def_hash):
+    with _rebuild_locks_guard:
+        return _rebuild_locks.setdefault((cache_dir, def_hash), threading.RLock())
+
+
+def _temp_file(path, mode):
+    """File sementara unik di direktori tujuan (penulis paralel tidak bentrok)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    return os.fdopen(fd, mode), tmp_path
+
+
+def _write_json(path, payload):
+    f, tmp_path = _temp_file(path, "w")
+    with f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _write_meta(ticker_dir, ticker, key, feature_names, interval, rows, state):
+    # meta.json ditulis terakhir: jadi penanda bahwa semua array sudah lengkap
+    _write_json(os.path.join(ticker_dir, "meta.json"), {
+        "ticker": ticker,
+        "cache_key": key,
+        "source_hash": key.split("-")[0],
+        "feature_names": feature_names,
+        "interval": interval,
+        "rows": int(rows),
+        "state": state,
+    })
+
+
+def _save_feature_set(cache_dir, def_hash, ticker, key, feature_set):
+    ticker_dir = _ticker_dir(cache_dir, def_hash, ticker)
+    os.makedirs(ticker_dir, exist_ok=True)
+    for name in ("X", "y", "dates", "close"):
+        # Tulis ke file sementara lalu os.replace: array lama yang sedang
+        # di-mmap oleh proses lain (server) tetap valid sampai dilepas.
+        # C-order supaya baris baru nanti bisa di-append (_append_npy).
+        path = os.path.join(ticker_dir, f"{name}.npy")
+        f, tmp_path = _temp_file(path, "wb")
+        with f:
+            np.save(f, np.ascontiguousarray(feature_set[name]))
+        os.replace(tmp_path, path)
+    _write_meta(
+        ticker_dir, ticker, key, feature_set["feature_names"], feature_set.get("interval"),
+        len(feature_set["X"]), feature_set["state"],
+    )
+
+
+def _append_npy(path, new_values, last_value=None):
+    """
+    Append baris ke file .npy tanpa memuat array lama ke memori: header
+    ditulis ulang dengan shape baru, data lama disalin per blok, baris baru
+    ditambahkan, lalu os.replace. last_value (opsional) menimpa elemen
+    terakhir array lama (target y yang baru diketahui).
+    """
+    with open(path, "rb") as src:
+        version = np.lib.format.read_magic(src)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(src)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(src)
+        if fortran_order:
+            raise ValueError(f"Array Fortran-order tidak bisa di-append: {path}")
+
+        new_values = np.ascontiguousarray(new_values, dtype=dtype).reshape((-1,) + tuple(shape[1:]))
+        header = {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (shape[0] + len(new_values),) + tuple(shape[1:]),
+        }
+        f, tmp_path = _temp_file(path, "wb")
+        with f:
+            np.lib.format.write_array_header_2_0(f, header)
+            data_offset = f.tell()
+            shutil.copyfileobj(src, f)
+            if last_value is not None and shape[0] > 0:
+                f.seek(data_offset + (shape[0] - 1) * dtype.itemsize)
+                f.write(np.asarray(last_value, dtype=dtype).tobytes())
+                f.seek(0, os.SEEK_END)
+            f.write(new_values.tobytes())
+    os.replace(tmp_path, path)
+
+
+def _append_feature_set(cache_dir, def_hash, ticker, key, meta, new_rows):
+    """Append hasil extend_features ke cache ticker (histori lama tidak dimuat)."""
+    ticker_dir = _ticker_dir(cache_dir, def_hash, ticker)
+    for name in ("X", "y", "dates", "close"):
+        last_value = new_rows["last_y"] if name == "y" else None
+        _append_npy(os.path.join(ticker_dir, f"{name}.npy"), new_rows[name], last_value)
+    _write_meta(
+        ticker_dir, ticker, key, meta["feature_names"], meta.get("interval"),
+        meta["rows"] + len(new_rows["X"]), new_rows["state"],
+    )
+    return _load_feature_set(cache_dir, def_hash, ticker, key)
+
+
+def _read_meta(cache_dir, def_hash, ticker):
+    return _read_json(os.path.join(_ticker_dir(cache_dir, def_hash, ticker), "meta.json"))
+
+
+def _load_feature_set(cache_dir, def_hash, ticker, key, meta=None):
+    ticker_dir = _ticker_dir(cache_dir, def_hash, ticker)
+    meta = meta or _read_json(os.path.join(ticker_dir, "meta.json"))
+    if not meta or (key is not None and meta.get("cache_key") != key):
+        return None
+    try:
+        feature_set = {
+            name: np.load(os.path.join(ticker_dir, f"{name}.npy"), mmap_mode='r')
+            for name in ("X", "y", "dates", "close")
+        }
+    except (OSError, ValueError):
+        return None
+    feature_set["feature_names"] = meta["feature_names"]
+    feature_set["interval"] = meta.get("interval")
+    feature_set["state"] = meta["state"]
+    return feature_set
+
+
+def _refresh_ticker(cache_dir, def_hash, ticker, df_ticker, key, feature_names, interval=None):
+    """
+    Return (feature_set, status) dengan status 'cached', 'extended' atau 'rebuilt'.
+    'extended' dipakai jika data lama hanya ditambah bar baru di belakang.
+    """
+    meta = _read_meta(cache_dir, def_hash, ticker)
+    if meta and meta.get("cache_key") == key:
+        feature_set = _load_feature_set(cache_dir, def_hash, ticker, key, meta=meta)
+        if feature_set is not None:
+            return feature_set, "cached"
+
+    if meta and 0 < meta.get("rows", 0) < len(df_ticker):
+        prefix = df_ticker.iloc[:meta["rows"]]
+        if source_hash(prefix) == meta.get("source_hash"):
+            new_rows = extend_features(meta, df_ticker.iloc[meta["rows"]:])
+            try:
+                feature_set = _append_feature_set(cache_dir, def_hash, ticker, key, meta, new_rows)
+            except (OSError, ValueError):
+                feature_set = None
+            if feature_set is not None:
+                return feature_set, "extended"
+
+    feature_set = build_features(df_ticker, feature_names)
+    feature_set["interval"] = interval
+    _save_feature_set(cache_dir, def_hash, ticker, key, feature_set)
+    return feature_set, "rebuilt"
+
+
+def materialize_features(data_path, tickers=None, cache_dir=FEATURE_CACHE_DIR, feature_names=None, interval=None):
+    """
+    Membangun (atau memakai ulang) matriks fitur per ticker dari CSV mentah.
+    Hanya ticker yang data mentahnya berubah yang dihitung ulang.
+    interval: resample bar ke interval yang lebih kasar dulu (None = apa adanya).
+    Return: dict ticker -> feature_set
+    """
+    def_hash = feature_definition_hash(feature_names, interval, source=data_path)
+    with _rebuild_lock(cache_dir, def_hash):
+        return _materialize(data_path, tickers, cache_dir, feature_names, interval, def_hash)
+
+
+def _materialize(data_path, tickers, cache_dir, feature_names, interval, def_hash):
+    # Fingerprint diambil sebelum membaca: jika CSV berubah selama dibaca,
+    # index tetap dianggap basi dan request berikutnya membangun ulang
+    fingerprint = file_fingerprint(data_path)
+    counts = ticker_row_counts(data_path)
+    all_tickers = sorted(counts)
+
+    index_path = os.path.join(cache_dir, def_hash, _INDEX_FILE)
+    index = _read_json(index_path) or {}
+
+    # Key lama hanya valid selama CSV sumbernya masih file yang sama
+    same_source = (
+        index.get("source") == os.path.abspath(data_path)
+        and index.get("source_fingerprint") == fingerprint
+    )
+    keys = index.get("keys", {}) if same_source else {}
+
+    results = {}
+    rebuilt = []
+    extended = []
+    # Satu ticker per iterasi: memori sebanding dengan histori satu ticker
+    for ticker, df_ticker in iter_ticker_bars(data_path, tickers, counts=counts):
+        if interval is not None:
+            df_ticker = resample_bars(df_ticker, interval)
+        key = f"{source_hash(df_ticker)}-{def_hash}"
+
+        feature_set, status = _refresh_ticker(cache_dir, def_hash, ticker, df_ticker, key, feature_names, interval)
+        if status == "rebuilt":
+            rebuilt.append(ticker)
+        elif status == "extended":
+            extended.append(ticker)
+
+        keys[ticker] = key
+        results[ticker] = feature_set
+        _memory_cache[(cache_dir, def_hash, ticker)] = (key, feature_set)
+
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    _write_json(index_path, {
+        "source": os.path.abspath(data_path),
+        "source_fingerprint": fingerprint,
+        "tickers": all_tickers,
+        "keys": keys,
+    })
+
+    if rebuilt:
+        print(f"🧮 [FEATURES] Dihitung ulang: {rebuilt}")
+    if extended:
+        print(f"🧮 [FEATURES] Diperbarui inkremental: {extended}")
+    if not rebuilt and not extended:
+        print("🧮 [FEATURES] Semua fitur diambil dari cache.")
+
+    return results
+
+
+def _lookup_cached(data_path, ticker, cache_dir, def_hash):
+    """
+    Cari feature_set lewat index tanpa membaca CSV.
+    Return (status, feature_set): status 'hit', 'absent' (ticker tidak ada di
+    data), 'unindexed' (ticker belum dimaterialisasi) atau 'stale'.
+    """
+    index = _read_json(os.path.join(cache_dir, def_hash, _INDEX_FILE))
+    fresh = (
+        index is not None
+        and index.get("source") == os.path.abspath(data_path)
+        and index.get("source_fingerprint") == file_fingerprint(data_path)
+    )
+    if not fresh:
+        return "stale", None
+    if ticker not in index.get("tickers", []):
+        return "absent", None
+
+    key = index.get("keys", {}).get(ticker)
+    if key is None:
+        return "unindexed", None
+
+    cached = _memory_cache.get((cache_dir, def_hash, ticker))
+    if cached and cached[0] == key:
+        return "hit", cached[1]
+
+    feature_set = _load_feature_set(cache_dir, def_hash, ticker, key)
+    if feature_set is None:
+        return "stale", None
+    _memory_cache[(cache_dir, def_hash, ticker)] = (key, feature_set)
+    return "hit", feature_set
+
+
+def load_features(data_path, ticker, cache_dir=FEATURE_CACHE_DIR, feature_names=None, interval=None):
+    """
+    Mengambil feature_set satu ticker. Jika CSV sumber tidak berubah sejak
+    materialisasi terakhir (size + mtime sama), CSV tidak dibaca sama sekali.
+    Return None jika ticker tidak ada di data.
+    """
+    if not os.path.exists(data_path):
+        return None
+
+    def_hash = feature_definition_hash(feature_names, interval, source=data_path)
+    status, feature_set = _lookup_cached(data_path, ticker, cache_dir, def_hash)
+    if status in ("hit", "absent"):
+        return feature_set
+
+    with _rebuild_lock(cache_dir, def_hash):
+        # Cek ulang: request lain mungkin baru saja selesai membangun ulang
+        status, feature_set = _lookup_cached(data_path, ticker, cache_dir, def_hash)
+        if status in ("hit", "absent"):
+            return feature_set
+        # Hanya ticker yang diminta: ticker lain ditandai 'unindexed' di index
+        # dan dibangun saat diminta (atau oleh materialize_features_task)
+        return _materialize(data_path, [ticker], cache_dir, feature_names, interval, def_hash).get(ticker)
+
+
+def training_frame(feature_set, max_rows=None):
+    """
+    Baris yang target-nya tersedia, dalam bentuk pandas untuk sklearn.
+    max_rows: subsampling (lihat bars.subsample_indices). Array di-mmap,
+    jadi hanya baris terpilih yang benar-benar dibaca ke memori.
+    """
+    y = np.asarray(feature_set["y"])
+    rows = np.flatnonzero(~np.isnan(y))
+    rows = rows[subsample_indices(len(rows), max_rows)]
+    X = pd.DataFrame(feature_set["X"][rows], columns=feature_set["feature_names"])
+    return (
+        X,
+        pd.Series(y[rows], name='Target'),
+        pd.Series(np.asarray(feature_set["dates"])[rows], name='Date'),
+    )
+
+
+def last_row(feature_set):
+    """Baris fitur terakhir sebagai DataFrame 1 baris."""
+    return pd.DataFrame(
+        np.array(feature_set["X"][-1:], dtype='float64'),
+        columns=feature_set["feature_names"],
+    )
+
+
+def forecast_state(feature_set):
+    """Salinan rolling state bar terakhir, aman untuk dimajukan forecaster."""
+    return json.loads(json.dumps(feature_set["state"]))
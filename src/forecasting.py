@@ -0,0 +1,44 @@
+import pandas as pd
+from src.indicators import IndicatorEngine
+from src.feature_store import last_row, forecast_state
+
+
+def next_bar(pred_price, prev_bar):
+    """
+    Bar sintetis untuk langkah berikutnya:
+    Open = Close sebelumnya, High = +1%, Low = -1%, Volume tidak diubah.
+    """
+    return {
+        'Open': pred_price,
+        'High': pred_price * 1.01,
+        'Low': pred_price * 0.99,
+        'Close': pred_price,
+        'Volume': prev_bar['Volume'],
+    }
+
+
+def iter_recursive_forecast(model, feature_set, days=7, on_step=None):
+    """
+    Forecast rekursif - dipakai training pipeline DAN API.
+    Menghasilkan harga (dibulatkan) satu per langkah, sehingga endpoint
+    streaming bisa mengirim tiap hari segera setelah dihitung.
+    Indikator dimajukan dari rolling state feature store, bukan dihitung ulang.
+    on_step: dipanggil sebelum tiap langkah (mis. cek deadline request).
+    """
+    feature_names = feature_set["feature_names"]
+    engine = IndicatorEngine(feature_names)
+    state = forecast_state(feature_set)
+    current_input = last_row(feature_set)
+
+    for _ in range(days):
+        if on_step is not None:
+            on_step()
+        pred_price = float(model.predict(current_input)[0])
+        yield round(pred_price, 0)
+
+        row = engine.update(state, next_bar(pred_price, state["bar"]))
+        current_input = pd.DataFrame([row], columns=feature_names)
+
+
+def recursive_forecast_prices(model, feature_set, days=7, on_step=None):
+    return list(iter_recursive_forecast(model, feature_set, days=days, on_step=on_step))
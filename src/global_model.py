@@ -0,0 +1,190 @@
+import os
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from src.feature_store import load_features, training_frame
+from src.indicators import DEFAULT_FEATURES, parse_feature
+from src.model_registry import save_model, load_model, model_path
+
+GLOBAL_MODEL_FILENAME = "model_GLOBAL.pkl"
+
+# Sektor per ticker untuk encoding. Ticker yang tidak terdaftar -> "LAINNYA".
+TICKER_SECTORS = {
+    "BBRI.JK": "KEUANGAN",
+    "BMRI.JK": "KEUANGAN",
+    "BBNI.JK": "KEUANGAN",
+    "BBTN.JK": "KEUANGAN",
+    "BRIS.JK": "KEUANGAN",
+}
+UNKNOWN_CODE = -1
+
+# Global model dianggap kalah jika MAPE-nya melebihi pembanding lebih dari ini
+FALLBACK_TOLERANCE = 0.05
+
+# Fitur bernilai "harga" dinormalisasi dengan skala harga per ticker
+_PRICE_KINDS = {'Open', 'High', 'Low', 'Close', 'sma'}
+
+
+def global_model_path(model_dir):
+    return os.path.join(model_dir, GLOBAL_MODEL_FILENAME)
+
+
+def sector_of(ticker):
+    return TICKER_SECTORS.get(ticker, "LAINNYA")
+
+
+def _scales(feature_set, n_rows):
+    """Skala normalisasi per ticker, dihitung dari porsi training saja."""
+    close = np.asarray(feature_set["close"][:n_rows], dtype='float64')
+    X = np.asarray(feature_set["X"][:n_rows], dtype='float64')
+    volume_idx = feature_set["feature_names"].index('Volume') if 'Volume' in feature_set["feature_names"] else None
+    volume_scale = float(np.nanmean(X[:, volume_idx])) if volume_idx is not None else 1.0
+    return {
+        "price": float(np.nanmean(close)) or 1.0,
+        "volume": volume_scale or 1.0,
+    }
+
+
+def normalize(X, feature_names, scales, ticker_code, sector_code):
+    """
+    X (DataFrame/array, skala asli) -> DataFrame ternormalisasi + kolom encoding.
+    Return juga Close asli, dipakai untuk mengembalikan target ke harga.
+    """
+    values = np.array(X, dtype='float64', copy=True)
+    for i, name in enumerate(feature_names):
+        kind, _ = parse_feature(name)
+        if kind in _PRICE_KINDS:
+            values[:, i] /= scales["price"]
+        elif kind == 'Volume':
+            values[:, i] /= scales["volume"]
+
+    frame = pd.DataFrame(values, columns=feature_names)
+    frame['ticker_code'] = ticker_code
+    frame['sector_code'] = sector_code
+    close = np.asarray(X, dtype='float64')[:, feature_names.index('Close')]
+    return frame, close
+
+
+class GlobalTickerModel:
+    """
+    Adapter: membuat global model terlihat seperti model per-ticker
+    (predict(DataFrame fitur mentah) -> harga), sehingga recursive_forecast
+    dan endpoint /predict & /portfolio tidak perlu tahu bedanya.
+    """
+
+    def __init__(self, bundle, ticker, feature_set=None):
+        self.model = bundle["model"]
+        self.feature_names = bundle["feature_names"]
+        self.ticker = ticker
+        self.ticker_code = bundle["ticker_codes"].get(ticker, UNKNOWN_CODE)
+        self.sector_code = bundle["sector_codes"].get(sector_of(ticker), UNKNOWN_CODE)
+
+        scales = bundle["scales"].get(ticker)
+        if scales is None and feature_set is not None:
+            scales = _scales(feature_set, len(feature_set["close"]))
+        self.scales = scales or {"price": 1.0, "volume": 1.0}
+
+    def predict(self, X):
+        frame, close = normalize(X, self.feature_names, self.scales, self.ticker_code, self.sector_code)
+        # Target global model = rasio Close besok / Close hari ini
+        return self.model.predict(frame) * close
+
+
+def _split(feature_set):
+    X, y, dates = training_frame(feature_set)
+    split_idx = int(len(X) * 0.8)
+    return X, y, split_idx
+
+
+def _mape(actual, predicted):
+    actual = np.asarray(actual, dtype='float64')
+    return float(np.mean(np.abs((actual - predicted) / actual)) * 100)
+
+
+def train_global_model(data_path, tickers, params, features=None, model_dir="models"):
+    """
+    Satu RandomForest untuk semua ticker, dilatih dari data gabungan yang
+    dinormalisasi per ticker + encoding ticker & sektor.
+    Return bundle (sudah disimpan) termasuk daftar ticker fallback.
+    """
+    feature_names = list(features or DEFAULT_FEATURES)
+    sectors = sorted({sector_of(t) for t in tickers})
+    sector_codes = {s: i for i, s in enumerate(sectors)}
+    ticker_codes = {}
+    scales = {}
+
+    train_parts, train_targets = [], []
+    test_sets = {}
+    for ticker in tickers:
+        feature_set = load_features(data_path, ticker, feature_names=feature_names)
+        if feature_set is None:
+            continue
+        X, y, split_idx = _split(feature_set)
+        if len(X) < 50:
+            print(f"Skipping {ticker} (Data kurang)")
+            continue
+
+        ticker_codes[ticker] = len(ticker_codes)
+        scales[ticker] = _scales(feature_set, split_idx)
+        frame, close = normalize(
+            X.values, feature_names, scales[ticker],
+            ticker_codes[ticker], sector_codes[sector_of(ticker)],
+        )
+
+        train_parts.append(frame.iloc[:split_idx])
+        train_targets.append(y.values[:split_idx] / close[:split_idx])
+        test_sets[ticker] = (frame.iloc[split_idx:], close[split_idx:], y.values[split_idx:])
+
+    if not train_parts:
+        raise RuntimeError("Global model gagal: tidak ada ticker dengan data cukup.")
+
+    model = RandomForestRegressor(random_state=42, **params)
+    model.fit(pd.concat(train_parts, ignore_index=True), np.concatenate(train_targets))
+
+    # Evaluasi per ticker vs model per-ticker (jika ada) atau baseline naive
+    per_ticker_metrics = {}
+    fallback = []
+    for ticker, (frame, close, actual) in test_sets.items():
+        global_mape = _mape(actual, model.predict(frame) * close)
+
+        baseline_name = "naive"
+        baseline_mape = _mape(actual, close)
+        single_path = model_path(model_dir, ticker)
+        if os.path.exists(single_path):
+            single_mape = load_model(single_path)["metrics"].get("mape")
+            if single_mape is not None:
+                baseline_name, baseline_mape = "per_ticker", float(single_mape)
+
+        use_fallback = global_mape > baseline_mape * (1 + FALLBACK_TOLERANCE)
+        if use_fallback:
+            fallback.append(ticker)
+
+        per_ticker_metrics[ticker] = {
+            "mape": global_mape,
+            "baseline": baseline_name,
+            "baseline_mape": baseline_mape,
+            "fallback": use_fallback,
+        }
+        status = "↩️ fallback per-ticker" if use_fallback else "✅ global"
+        print(f"   {ticker}: MAPE global {global_mape:.2f}% vs {baseline_name} {baseline_mape:.2f}% -> {status}")
+
+    os.makedirs(model_dir, exist_ok=True)
+    path = global_model_path(model_dir)
+    bundle = save_model(
+        model, path,
+        feature_names=feature_names,
+        params=params,
+        metrics={
+            "mape": float(np.mean([m["mape"] for m in per_ticker_metrics.values()])),
+            "per_ticker": per_ticker_metrics,
+        },
+        extra={
+            "kind": "global",
+            "ticker_codes": ticker_codes,
+            "sector_codes": sector_codes,
+            "scales": scales,
+            "fallback": fallback,
+        },
+    )
+    print(f"💾 Global Model Saved: {path} ({len(ticker_codes)} ticker, fallback: {fallback})")
+    return bundle
@@ -0,0 +1,209 @@
+import re
+import numpy as np
+import pandas as pd
+
+BASE_FEATURES = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Fitur default untuk model baru. Model lama (hanya OHLCV) tetap bisa dipakai
+# karena daftar fitur selalu dibaca dari artifact model.
+DEFAULT_FEATURES = BASE_FEATURES + [
+    'ret_1', 'ret_5',      # lagged return
+    'sma_5', 'sma_20',     # rolling mean Close
+    'vol_20',              # volatilitas (std return harian)
+    'rsi_14',              # RSI Wilder
+    'vz_20',               # z-score volume
+]
+
+_INDICATOR_PATTERN = re.compile(r'^(ret|sma|vol|rsi|vz)_(\d+)$')
+
+
+def parse_feature(name):
+    """'sma_20' -> ('sma', 20). Kolom OHLCV -> (name, None)."""
+    if name in BASE_FEATURES:
+        return name, None
+    match = _INDICATOR_PATTERN.match(name)
+    if not match:
+        raise ValueError(f"Fitur tidak dikenal: {name}")
+    window = int(match.group(2))
+    if window < 1:
+        raise ValueError(f"Window fitur harus >= 1: {name}")
+    return match.group(1), window
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.divide(avg_gain, avg_loss)
+        return 100.0 - 100.0 / (1.0 + rs)
+
+
+class IndicatorEngine:
+    """
+    Menghitung fitur teknikal dengan dua cara yang hasilnya identik:
+      - compute(): vektorisasi atas seluruh histori (sekali saja)
+      - update(): satu bar baru dari rolling state tersimpan, biaya
+        konstan terhadap panjang histori (hanya sebesar window terbesar)
+    State berupa dict JSON-serializable, jadi bisa disimpan di feature store
+    dan dimajukan langkah demi langkah oleh recursive forecaster.
+    """
+
+    def __init__(self, feature_names=None):
+        self.feature_names = list(feature_names or DEFAULT_FEATURES)
+        self.specs = [parse_feature(name) for name in self.feature_names]
+
+        windows = {}
+        for kind, window in self.specs:
+            if window is not None:
+                windows.setdefault(kind, set()).add(window)
+        self.windows = {kind: sorted(ws) for kind, ws in windows.items()}
+
+        # Panjang buffer yang perlu disimpan di state
+        self._close_len = max(
+            [w + 1 for w in self.windows.get('ret', [])]
+            + self.windows.get('sma', [])
+            + [2]
+        )
+        self._return_len = max(self.windows.get('vol', [0]))
+        self._volume_len = max(self.windows.get('vz', [0]))
+
+    # ------------------------------------------------------------------
+    # Vectorized (full history)
+    # ------------------------------------------------------------------
+
+    def compute(self, bars):
+        """
+        bars: DataFrame OHLCV urut tanggal.
+        Return: (features DataFrame dengan kolom = feature_names, state)
+        """
+        base = bars[BASE_FEATURES].astype('float64').ffill()
+        close = base['Close']
+        volume = base['Volume']
+        ret_1 = close.pct_change(fill_method=None)
+
+        columns = {}
+        rsi_avgs = {}
+        for name, (kind, window) in zip(self.feature_names, self.specs):
+            if window is None:
+                columns[name] = base[name]
+            elif kind == 'ret':
+                columns[name] = close.pct_change(window, fill_method=None)
+            elif kind == 'sma':
+                columns[name] = close.rolling(window, min_periods=window).mean()
+            elif kind == 'vol':
+                columns[name] = ret_1.rolling(window, min_periods=window).std()
+            elif kind == 'vz':
+                mean = volume.rolling(window, min_periods=window).mean()
+                std = volume.rolling(window, min_periods=window).std()
+                columns[name] = (volume - mean) / std.replace(0.0, np.nan)
+            elif kind == 'rsi':
+                delta = close.diff()
+                avg_gain = delta.clip(lower=0).ewm(alpha=1.0 / window, adjust=False).mean()
+                avg_loss = (-delta.clip(upper=0)).ewm(alpha=1.0 / window, adjust=False).mean()
+                rsi = pd.Series(_rsi_from_averages(avg_gain.values, avg_loss.values), index=close.index)
+                rsi[delta.notna().cumsum() < window] = np.nan
+                columns[name] = rsi
+                rsi_avgs[window] = (avg_gain, avg_loss)
+
+        features = pd.DataFrame(columns, index=bars.index)[self.feature_names]
+        features = features.replace([np.inf, -np.inf], np.nan).fillna(0)
+
+        state = self._state_from_history(base, ret_1, rsi_avgs)
+        return features, state
+
+    def _state_from_history(self, base, ret_1, rsi_avgs):
+        n_deltas = int(base['Close'].diff().notna().sum())
+        last_bar = base.iloc[-1].fillna(0) if len(base) else pd.Series(0.0, index=BASE_FEATURES)
+        return {
+            "feature_names": self.feature_names,
+            "bar": {k: float(last_bar[k]) for k in BASE_FEATURES},
+            "closes": base['Close'].tail(self._close_len).tolist(),
+            "returns": ret_1.tail(self._return_len).tolist() if self._return_len else [],
+            "volumes": base['Volume'].tail(self._volume_len).tolist() if self._volume_len else [],
+            "rsi": {
+                str(w): [_last_or_nan(g), _last_or_nan(l)]
+                for w, (g, l) in rsi_avgs.items()
+            },
+            "n_deltas": n_deltas,
+        }
+
+    # ------------------------------------------------------------------
+    # Incremental (satu bar)
+    # ------------------------------------------------------------------
+
+    def update(self, state, bar):
+        """
+        Memajukan state dengan satu bar baru (dict OHLCV) dan mengembalikan
+        baris fitur (np.ndarray) untuk bar tersebut. State diubah in-place.
+        """
+        prev_bar = state["bar"]
+        filled = {}
+        for k in BASE_FEATURES:
+            v = bar.get(k, np.nan)
+            filled[k] = prev_bar[k] if v is None or np.isnan(v) else float(v)
+
+        closes = state["closes"]
+        prev_close = closes[-1] if closes else np.nan
+        close = filled['Close']
+        ret_1 = close / prev_close - 1.0 if prev_close else np.nan
+
+        closes.append(close)
+        del closes[:-self._close_len]
+
+        if self._return_len:
+            state["returns"].append(ret_1)
+            del state["returns"][:-self._return_len]
+        if self._volume_len:
+            state["volumes"].append(filled['Volume'])
+            del state["volumes"][:-self._volume_len]
+
+        delta = close - prev_close if closes[:-1] else np.nan
+        if not np.isnan(delta):
+            state["n_deltas"] += 1
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            for w in self.windows.get('rsi', []):
+                avg_gain, avg_loss = state["rsi"].get(str(w), [np.nan, np.nan])
+                if np.isnan(avg_gain):
+                    avg_gain, avg_loss = gain, loss
+                else:
+                    avg_gain += (gain - avg_gain) / w
+                    avg_loss += (loss - avg_loss) / w
+                state["rsi"][str(w)] = [avg_gain, avg_loss]
+
+        state["bar"] = filled
+
+        row = np.empty(len(self.feature_names), dtype='float64')
+        for i, (kind, window) in enumerate(self.specs):
+            if window is None:
+                row[i] = filled[kind]
+            elif kind == 'ret':
+                base_close = closes[-window - 1] if len(closes) > window else np.nan
+                row[i] = close / base_close - 1.0 if base_close else np.nan
+            elif kind == 'sma':
+                row[i] = np.mean(closes[-window:]) if len(closes) >= window else np.nan
+            elif kind == 'vol':
+                row[i] = _window_std(state["returns"], window)
+            elif kind == 'vz':
+                values = state["volumes"][-window:]
+                std = _window_std(values, window)
+                row[i] = (values[-1] - np.mean(values)) / std if std else np.nan
+            elif kind == 'rsi':
+                if state["n_deltas"] < window:
+                    row[i] = np.nan
+                else:
+                    avg_gain, avg_loss = state["rsi"][str(window)]
+                    row[i] = _rsi_from_averages(avg_gain, avg_loss)
+
+        row[~np.isfinite(row)] = 0.0
+        return row
+
+
+def _last_or_nan(series):
+    return float(series.iloc[-1]) if len(series) else float('nan')
+
+
+def _window_std(values, window):
+    if len(values) < window:
+        return np.nan
+    window_values = np.asarray(values[-window:], dtype='float64')
+    if np.isnan(window_values).any():
+        return np.nan
+    return float(np.std(window_values, ddof=1)) if window > 1 else np.nan
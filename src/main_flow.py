@@ -1,25 +1,48 @@
 from prefect import flow
+from src.bars import DEFAULT_INTERVAL, INTERVALS
 from src.data_ingestion import ingest_task
-from src.model_training import train_model
+from src.model_training import train_model, materialize_features_task, train_global_model_task, push_artifacts_task
 
 @flow(name="Stock-Prediction-Pipeline-v1", log_prints=True)
-def main_flow(tickers: list = ["BBRI.JK", "BMRI.JK", "BBNI.JK", "BBTN.JK", "BRIS.JK"]):
+def main_flow(tickers: list = ["BBRI.JK", "BMRI.JK", "BBNI.JK", "BBTN.JK", "BRIS.JK"], features: list = None,
+              model_mode: str = "per_ticker", interval: str = DEFAULT_INTERVAL, resample_intervals: list = None):
     
     
-    
-    csv_path = ingest_task(tickers=tickers)
+    # interval: bar yang diunduh & disimpan (1d, 1h, 1m, ...)
+    csv_path = ingest_task(tickers=tickers, interval=interval)
     
     
     train_params = {'n_estimators': 100, 'max_depth': 10} 
     
+    # resample_intervals: model tambahan di interval lebih kasar, di-resample
+    # dari bar yang sama (mis. interval="1m", resample_intervals=["15m", "1h"])
     results = []
-    for ticker in tickers:
-        
-        res = train_model(data_path=csv_path, ticker=ticker, params=train_params)
+    for train_interval in [interval] + list(resample_intervals or []):
+        if INTERVALS[train_interval]["minutes"] < INTERVALS[interval]["minutes"]:
+            raise ValueError(f"Tidak bisa resample {interval} ke interval lebih halus: {train_interval}")
+        resample_to = None if train_interval == interval else train_interval
+
+        # features=None -> DEFAULT_FEATURES (OHLCV + indikator teknikal)
+        materialize_features_task(csv_path, tickers, features, resample_to)
         
+        # model_mode="global": satu model gabungan, model per-ticker hanya dilatih
+        # untuk ticker di mana global model kalah akurat (fallback).
+        # Global model saat ini hanya untuk bar harian.
+        train_tickers = tickers
+        if model_mode == "global" and train_interval == DEFAULT_INTERVAL and resample_to is None:
+            train_tickers = train_global_model_task(csv_path, tickers, train_params, features)
         
-        if res is not None:
-            results.append(res)
+        for ticker in train_tickers:
+            
+            res = train_model(data_path=csv_path, ticker=ticker, params=train_params, features=features,
+                              interval=train_interval, resample_to=resample_to)
+            
+            
+            if res is not None:
+                results.append(res)
+    
+    # Hanya object yang berubah yang di-upload (jika ARTIFACT_REMOTE di-set)
+    push_artifacts_task()
         
     print("\n=== PIPELINE SELESAI ===")
     print("Rekapitulasi Rekomendasi AI:")
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import joblib
+from src.indicators import BASE_FEATURES
+from src.bars import DEFAULT_INTERVAL
+
+# Artifact model disimpan sebagai dict (bundle) supaya daftar fitur,
+# parameter dan metrik ikut tercatat bersama estimator-nya.
+ARTIFACT_VERSION = 1
+
+
+def model_filename(ticker, interval=DEFAULT_INTERVAL):
+    safe_ticker = ticker.replace(".", "_")
+    # Model harian tetap memakai nama lama; interval lain diberi akhiran
+    if interval == DEFAULT_INTERVAL:
+        return f"model_{safe_ticker}.pkl"
+    return f"model_{safe_ticker}_{interval}.pkl"
+
+
+def model_path(model_dir, ticker, interval=DEFAULT_INTERVAL):
+    return os.path.join(model_dir, model_filename(ticker, interval))
+
+
+def sidecar_path(path):
+    """Metadata ringan (params, metrik) di samping artifact, dibaca catalog."""
+    return f"{path}.meta.json"
+
+
+def _temp_file(path, mode):
+    """File sementara unik di direktori tujuan (training paralel tidak bentrok)."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    # mkstemp membuat file 0600; artifact harus tetap terbaca proses lain (server, DVC)
+    os.chmod(tmp_path, 0o644)
+    return os.fdopen(fd, mode), tmp_path
+
+
+def save_model(model, path, feature_names, params=None, metrics=None, extra=None):
+    bundle = {
+        "artifact_version": ARTIFACT_VERSION,
+        "model": model,
+        "feature_names": list(feature_names),
+        "params": dict(params or {}),
+        "metrics": dict(metrics or {}),
+        **(extra or {}),
+    }
+
+    # Tulis ke file sementara lalu os.replace: server yang sedang berjalan
+    # tidak pernah melihat artifact setengah jadi
+    f, tmp_path = _temp_file(path, "wb")
+    with f:
+        joblib.dump(bundle, f)
+    st = os.stat(tmp_path)
+    os.replace(tmp_path, path)
+
+    meta = {key: value for key, value in bundle.items() if key != "model"}
+    # size + mtime artifact: catalog mengabaikan sidecar yang tidak cocok
+    meta["artifact"] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    meta_path = sidecar_path(path)
+    f, tmp_path = _temp_file(meta_path, "w")
+    with f:
+        json.dump(meta, f, default=str)
+    os.replace(tmp_path, meta_path)
+    return bundle
+
+
+def read_sidecar(path):
+    """Return metadata sidecar jika masih cocok dengan artifact, selain itu None."""
+    try:
+        with open(sidecar_path(path)) as f:
+            meta = json.load(f)
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    artifact = meta.get("artifact", {})
+    if artifact.get("size") != st.st_size or artifact.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return meta
+
+
+def load_model(path):
+    """
+    Return bundle dict. Artifact lama (estimator mentah hasil joblib.dump)
+    tetap didukung: daftar fitur diambil dari feature_names_in_ / OHLCV.
+    """
+    obj = joblib.load(path)
+    if isinstance(obj, dict) and "model" in obj:
+        return obj
+
+    return {
+        "artifact_version": 0,
+        "model": obj,
+        "feature_names": list(getattr(obj, "feature_names_in_", BASE_FEATURES)),
+        "params": {},
+        "metrics": {},
+    }
@@ -1,4 +1,3 @@
-import joblib
 import os
 import uuid
 import pandas as pd
@@ -7,22 +6,38 @@ import matplotlib.pyplot as plt
 import base64
 import io
 import subprocess
-from datetime import timedelta
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from prefect import task, flow
-from prefect.artifacts import create_markdown_artifact
+from prefect.artifacts import create_markdown_artifact, create_table_artifact
+from src.feature_store import materialize_features, load_features, training_frame
+from src.forecasting import recursive_forecast_prices
+from src.indicators import DEFAULT_FEATURES
+from src.model_registry import save_model, model_filename
+from src.global_model import train_global_model
+from src import artifact_sync
+from src.profiling import StageProfiler
+from src.bars import DEFAULT_INTERVAL, is_intraday, next_timestamps, horizon_text
+from src.trading_calendar import get_calendar
 
 
 plt.style.use('ggplot')
 
 DATA_PATH = r"data/raw/stock_data.csv"
 TARGET_TICKERS = ["BBRI.JK", "BMRI.JK", "BBNI.JK", "BBTN.JK", "BRIS.JK"]
+# Batas baris training per ticker (histori intraday bisa jutaan baris)
+MAX_TRAIN_ROWS = int(os.getenv("MAX_TRAIN_ROWS", 200_000))
 
 @task(name="Pull Data from Remote")
 def pull_data_from_remote():
     
-    
+    # Delta sync: file lokal dipertahankan, hanya diganti jika hash-nya berubah
+    artifact_remote = os.getenv("ARTIFACT_REMOTE")
+    if artifact_remote:
+        print("☁️  [DOWNLOAD] Delta sync data dari artifact remote...")
+        artifact_sync.pull(artifact_sync.remote_from_url(artifact_remote), paths=artifact_sync.DATA_PATHS)
+        print("="*60 + "\n")
+        return
     
     if os.path.exists(DATA_PATH):
         print(f"Menghapus file lokal: {DATA_PATH}...")
@@ -71,17 +86,32 @@ def pull_data_from_remote():
     
     print("="*60 + "\n")
 
-def prepare_data(df, ticker):
-    data = df[df['Ticker'] == ticker].copy()
-    data = data.sort_values('Date')
-    features = ['Open', 'High', 'Low', 'Close', 'Volume']
-    data['Target'] = data['Close'].shift(-1)
-    
-    
-    last_row = data.iloc[[-1]][features].copy()
-    
-    data = data.dropna()
-    return data[features], data['Target'], data['Date'], last_row
+@task(name="Push Artifacts to Remote")
+def push_artifacts_task():
+    """Upload model & data yang berubah ke ARTIFACT_REMOTE + perbarui manifest."""
+    artifact_remote = os.getenv("ARTIFACT_REMOTE")
+    if not artifact_remote:
+        print("ℹ️  ARTIFACT_REMOTE tidak di-set, lewati delta push.")
+        return []
+    return artifact_sync.push(artifact_sync.remote_from_url(artifact_remote))
+
+def prepare_data(data_path, ticker, features=None, profiler=None, resample_to=None, max_rows=None):
+    profiler = profiler or StageProfiler(ticker, track_memory=False)
+    # CSV hanya di-parse jika berubah; selain itu fitur dibaca dari cache .npy
+    with profiler.stage("load_features"):
+        feature_set = load_features(
+            data_path, ticker, feature_names=features or DEFAULT_FEATURES, interval=resample_to
+        )
+    if feature_set is None:
+        return None
+    with profiler.stage("prepare_data"):
+        X, y, dates = training_frame(feature_set, max_rows=max_rows)
+    return X, y, dates, feature_set
+
+@task(name="Materialize Features")
+def materialize_features_task(data_path, tickers, features=None, resample_to=None):
+    materialize_features(data_path, tickers, feature_names=features or DEFAULT_FEATURES, interval=resample_to)
+    return data_path
 
 def plot_to_base64(fig):
     buffer = io.BytesIO()
@@ -91,7 +121,8 @@ def plot_to_base64(fig):
     buffer.close()
     return image_base64
 
-def generate_recommendation(current_price, future_prices):
+def generate_recommendation(current_price, future_prices, horizon=None):
+    horizon = horizon or horizon_text(len(future_prices))
     max_price = max(future_prices)
     min_price = min(future_prices)
     
@@ -100,10 +131,10 @@ def generate_recommendation(current_price, future_prices):
     
     if upside > 2.0:
         signal = "🟢 STRONG BUY"
-        reason = f"Potensi Profit: +{upside:.2f}% dalam 7 hari."
+        reason = f"Potensi Profit: +{upside:.2f}% dalam {horizon}."
     elif downside < -2.0:
         signal = "🔴 STRONG SELL"
-        reason = f"Risiko Jatuh: {downside:.2f}% dalam 7 hari."
+        reason = f"Risiko Jatuh: {downside:.2f}% dalam {horizon}."
     else:
         signal = "⚪ WAIT & HOLD"
         reason = "Pasar Sideways (Datar), tunggu sinyal lebih kuat."
@@ -111,13 +142,21 @@ def generate_recommendation(current_price, future_prices):
     return signal, reason, upside, downside
 
 @task(name="Train & Forecast")
-def train_model(data_path, ticker, params):
-    print(f"🚀 Processing: {ticker}...")
-    
-    df_raw = pd.read_csv(data_path)
-    df_raw['Date'] = pd.to_datetime(df_raw['Date'])
+def train_model(data_path, ticker, params, features=None, interval=DEFAULT_INTERVAL, resample_to=None):
+    """
+    interval: interval bar model (menentukan nama file model & langkah forecast).
+    resample_to: isi jika data_path berisi bar lebih halus yang harus di-resample.
+    """
+    print(f"🚀 Processing: {ticker} ({interval})...")
+    run_name = ticker if interval == DEFAULT_INTERVAL else f"{ticker}_{interval}"
+    profiler = StageProfiler(run_name, metadata={"params": params, "interval": interval})
     
-    X, y, dates, last_row_features = prepare_data(df_raw, ticker)
+    prepared = prepare_data(data_path, ticker, features, profiler, resample_to=resample_to, max_rows=MAX_TRAIN_ROWS)
+    if prepared is None:
+        print(f"Skipping {ticker} (Tidak ada di data)")
+        return None
+
+    X, y, dates, feature_set = prepared
     
     if len(X) < 50:
         print(f"Skipping {ticker} (Data kurang)")
@@ -129,102 +168,99 @@ def train_model(data_path, ticker, params):
     y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
     dates_test = dates.iloc[split_idx:]
     
+    profiler.metadata.update({"rows": len(X), "features": len(X.columns)})
+    
     model = RandomForestRegressor(random_state=42, **params)
-    model.fit(X_train, y_train)
+    with profiler.stage("fit"):
+        model.fit(X_train, y_train)
     
     # Evaluasi
-    predictions = model.predict(X_test)
-    mape = np.mean(np.abs((y_test - predictions) / y_test)) * 100
-    r2 = r2_score(y_test, predictions)
+    with profiler.stage("evaluate"):
+        predictions = model.predict(X_test)
+        mape = np.mean(np.abs((y_test - predictions) / y_test)) * 100
+        r2 = r2_score(y_test, predictions)
     
-    # --- 2. FORECASTING MASA DEPAN (7 HARI) ---
+    # --- 2. FORECASTING MASA DEPAN (7 HARI BURSA / 7 BAR INTRADAY) ---
     future_days = 7
-    future_predictions = []
-    future_dates = []
-    
-    current_input = last_row_features.values
-    feature_names = ['Open', 'High', 'Low', 'Close', 'Volume']
+    horizon_label = f"{future_days} Bar {interval}" if is_intraday(interval) else f"{future_days} Hari Bursa"
+    feature_names = feature_set["feature_names"]
     
-    last_real_date = df_raw[df_raw['Ticker'] == ticker]['Date'].iloc[-1]
-    last_real_price = df_raw[df_raw['Ticker'] == ticker]['Close'].iloc[-1]
+    last_real_date = pd.Timestamp(feature_set["dates"][-1])
+    last_real_price = float(feature_set["close"][-1])
     
-    for i in range(future_days):
-        current_input_df = pd.DataFrame(current_input, columns=feature_names)
-        pred_price = model.predict(current_input_df)[0]
-        pred_price_rounded = round(pred_price, 0)  # ✅ DI-ROUND!
-        future_predictions.append(pred_price_rounded)
-        
-        
-        next_date = last_real_date + timedelta(days=i+1)
-        future_dates.append(next_date)
-        
-        # Recursive update: Close hari ini jadi input besok
-        current_input[0, 3] = pred_price # Update Close
-        current_input[0, 0] = pred_price # Asumsi Open = Close sebelumnya
-        current_input[0, 1] = pred_price * 1.01   # High ✅
-        current_input[0, 2] = pred_price * 0.99
+    # Indikator (return, SMA, RSI, ...) dimajukan dari rolling state per langkah
+    with profiler.stage("forecast"):
+        future_predictions = recursive_forecast_prices(model, feature_set, days=future_days)
+        if is_intraday(interval):
+            future_dates = next_timestamps(last_real_date, future_days, interval)
+        else:
+            future_dates = get_calendar().next_sessions(last_real_date, future_days)
 
-    signal, reason, upside, downside = generate_recommendation(last_real_price, future_predictions)
+    signal, reason, upside, downside = generate_recommendation(last_real_price, future_predictions, horizon_text(future_days, interval))
 
     # ==========================================
     # 📊 VISUALISASI UTAMA (4 CHARTS)
     # ==========================================
 
     # 1. FORECAST CHART (Untuk End User - Fokus Tren)
-    fig1, ax1 = plt.subplots(figsize=(10, 5))
-    # Plot history (zoom in 45 hari terakhir)
-    ax1.plot(dates_test[-45:], y_test[-45:], label='Harga Historis', color='#34495e', linewidth=2)
-    # Plot forecast
-    ax1.plot(future_dates, future_predictions, label='Prediksi AI (7 Hari)', color='#e74c3c', marker='o', linestyle='--', linewidth=2)
-    # Highlight area forecast
-    ax1.fill_between(future_dates, min(future_predictions), max(future_predictions), color='#e74c3c', alpha=0.1)
+    with profiler.stage("render_forecast"):
+        fig1, ax1 = plt.subplots(figsize=(10, 5))
+        # Plot history (zoom in 45 hari terakhir)
+        ax1.plot(dates_test[-45:], y_test[-45:], label='Harga Historis', color='#34495e', linewidth=2)
+        # Plot forecast
+        ax1.plot(future_dates, future_predictions, label=f'Prediksi AI ({horizon_label})', color='#e74c3c', marker='o', linestyle='--', linewidth=2)
+        # Highlight area forecast
+        ax1.fill_between(future_dates, min(future_predictions), max(future_predictions), color='#e74c3c', alpha=0.1)
     
-    ax1.set_title(f"PROYEKSI HARGA: {ticker}", fontsize=14, fontweight='bold')
-    ax1.set_xlabel("Tanggal")
-    ax1.set_ylabel("Harga (Rp)")
-    ax1.legend()
-    chart_forecast = plot_to_base64(fig1)
-    plt.close(fig1)
+        ax1.set_title(f"PROYEKSI HARGA: {ticker}", fontsize=14, fontweight='bold')
+        ax1.set_xlabel("Tanggal")
+        ax1.set_ylabel("Harga (Rp)")
+        ax1.legend()
+        chart_forecast = plot_to_base64(fig1)
+        plt.close(fig1)
 
     # 2. FEATURE IMPORTANCE (Untuk Data Engineer - Explainability)
     # Menjelaskan KENAPA model memprediksi demikian
-    importances = model.feature_importances_
-    indices = np.argsort(importances)
+    with profiler.stage("render_importance"):
+        importances = model.feature_importances_
+        indices = np.argsort(importances)
     
-    fig2, ax2 = plt.subplots(figsize=(8, 4))
-    ax2.barh(range(len(indices)), importances[indices], color='#2ecc71', align='center')
-    ax2.set_yticks(range(len(indices)))
-    ax2.set_yticklabels([feature_names[i] for i in indices])
-    ax2.set_xlabel('Tingkat Kepentingan (Importance)')
-    ax2.set_title('Faktor Apa yang Paling Mempengaruhi AI?')
-    chart_features = plot_to_base64(fig2)
-    plt.close(fig2)
+        fig2, ax2 = plt.subplots(figsize=(8, 4))
+        ax2.barh(range(len(indices)), importances[indices], color='#2ecc71', align='center')
+        ax2.set_yticks(range(len(indices)))
+        ax2.set_yticklabels([feature_names[i] for i in indices])
+        ax2.set_xlabel('Tingkat Kepentingan (Importance)')
+        ax2.set_title('Faktor Apa yang Paling Mempengaruhi AI?')
+        chart_features = plot_to_base64(fig2)
+        plt.close(fig2)
 
     # 3. ACTUAL VS PREDICTED (Untuk Validasi - Trust)
     # Membuktikan akurasi model di masa lalu
-    fig3, ax3 = plt.subplots(figsize=(6, 6))
-    ax3.scatter(y_test, predictions, alpha=0.5, color='#9b59b6')
+    with profiler.stage("render_scatter"):
+        fig3, ax3 = plt.subplots(figsize=(6, 6))
+        ax3.scatter(y_test, predictions, alpha=0.5, color='#9b59b6')
     
-    # Garis diagonal sempurna
-    lims = [np.min([ax3.get_xlim(), ax3.get_ylim()]), np.max([ax3.get_xlim(), ax3.get_ylim()])]
-    ax3.plot(lims, lims, 'r-', alpha=0.75, zorder=0, linestyle='dashed')
+        # Garis diagonal sempurna
+        lims = [np.min([ax3.get_xlim(), ax3.get_ylim()]), np.max([ax3.get_xlim(), ax3.get_ylim()])]
+        ax3.plot(lims, lims, 'r-', alpha=0.75, zorder=0, linestyle='dashed')
     
-    ax3.set_xlabel('Harga Sebenarnya')
-    ax3.set_ylabel('Prediksi AI')
-    ax3.set_title(f'Uji Validitas Model (R2 Score: {r2:.2f})')
-    chart_scatter = plot_to_base64(fig3)
-    plt.close(fig3)
+        ax3.set_xlabel('Harga Sebenarnya')
+        ax3.set_ylabel('Prediksi AI')
+        ax3.set_title(f'Uji Validitas Model (R2 Score: {r2:.2f})')
+        chart_scatter = plot_to_base64(fig3)
+        plt.close(fig3)
 
     # 4. RESIDUALS / ERROR (Untuk Debugging)
     # Memastikan model tidak bias (error harus tersebar acak di sekitar 0)
-    residuals = y_test - predictions
-    fig4, ax4 = plt.subplots(figsize=(8, 3))
-    ax4.plot(dates_test, residuals, color='#e67e22', linewidth=1)
-    ax4.axhline(0, color='black', linestyle='--')
-    ax4.set_title('Analisis Error (Residuals) Sepanjang Waktu')
-    ax4.set_ylabel('Selisih (Rp)')
-    chart_residuals = plot_to_base64(fig4)
-    plt.close(fig4)
+    with profiler.stage("render_residuals"):
+        residuals = y_test - predictions
+        fig4, ax4 = plt.subplots(figsize=(8, 3))
+        ax4.plot(dates_test, residuals, color='#e67e22', linewidth=1)
+        ax4.axhline(0, color='black', linestyle='--')
+        ax4.set_title('Analisis Error (Residuals) Sepanjang Waktu')
+        ax4.set_ylabel('Selisih (Rp)')
+        chart_residuals = plot_to_base64(fig4)
+        plt.close(fig4)
 
     # ==========================================
     # 📝 REPORTING (MARKDOWN ARTIFACT)
@@ -232,7 +268,7 @@ def train_model(data_path, ticker, params):
     
     forecast_rows = ""
     for d, p in zip(future_dates, future_predictions):
-        d_str = d.strftime('%d-%b-%Y')
+        d_str = d.strftime('%d-%b-%Y %H:%M' if is_intraday(interval) else '%d-%b-%Y')
         trend_icon = "📈 NAIK" if p > last_real_price else "📉 TURUN"
         diff = p - last_real_price
         color = "green" if diff > 0 else "red"
@@ -246,7 +282,7 @@ def train_model(data_path, ticker, params):
 
 ---
 
-## 1. 🔮 Prediksi Minggu Depan (Untuk Investor)
+## 1. 🔮 Prediksi {horizon_label} ke Depan (Untuk Investor)
 Harga Saat Ini: **Rp {last_real_price:,.0f}**
 
 | Tanggal | Prediksi Harga | Tren vs Hari Ini |
@@ -279,19 +315,44 @@ Seberapa akurat model ini saat diuji dengan data masa lalu?
 ![Residuals](data:image/png;base64,{chart_residuals})
     """
     
-    create_markdown_artifact(
-        key=f"analysis-{ticker.lower().replace('.', '-')}-{str(uuid.uuid4())[:8]}",
-        markdown=markdown_report,
-        description=f"{signal} for {ticker}"
-    )
+    ticker_key = run_name.lower().replace('.', '-').replace('_', '-')
+    with profiler.stage("upload_artifact"):
+        create_markdown_artifact(
+            key=f"analysis-{ticker_key}-{str(uuid.uuid4())[:8]}",
+            markdown=markdown_report,
+            description=f"{signal} for {ticker}"
+        )
     
     # Simpan Model
     model_dir = os.path.abspath("models")
     os.makedirs(model_dir, exist_ok=True)
-    safe_ticker_name = ticker.replace(".", "_")
-    model_filename = os.path.join(model_dir, f"model_{safe_ticker_name}.pkl")
-    joblib.dump(model, model_filename)
-    print(f"💾 Model Saved: {model_filename}")
+    model_file = os.path.join(model_dir, model_filename(ticker, interval))
+    with profiler.stage("save_model"):
+        save_model(
+            model, model_file,
+            feature_names=feature_names,
+            params=params,
+            metrics={"mape": float(mape), "r2": float(r2)},
+            extra={"interval": interval},
+        )
+    print(f"💾 Model Saved: {model_file}")
+
+    # ⏱️ PROFIL TAHAPAN (Prefect + JSON lokal)
+    report = profiler.report()
+    report_path = profiler.save()
+    create_table_artifact(
+        key=f"profile-{ticker_key}",
+        table=profiler.table_rows(),
+        description=f"Profil training {ticker}: {report['total_seconds']:.2f} detik"
+    )
+    print(f"⏱️  Profil: {report['total_seconds']:.2f} detik total -> {report_path}")
+
+@task(name="Train Global Model")
+def train_global_model_task(data_path, tickers, params, features=None):
+    print(f"🌐 Training global model untuk {len(tickers)} ticker...")
+    bundle = train_global_model(data_path, tickers, params, features=features,
+                                model_dir=os.path.abspath("models"))
+    return bundle["fallback"]
 
 @flow(name="Stock-Prediction-System")
 def main_flow():
@@ -303,9 +364,13 @@ def main_flow():
         'min_samples_split': 5
     }
     
+    materialize_features_task(DATA_PATH, TARGET_TICKERS)
+
     print("\n=== MULAI ANALISIS PASAR ===")
     for ticker in TARGET_TICKERS:
         train_model(DATA_PATH, ticker, params)
 
+    push_artifacts_task()
+
 if __name__ == "__main__":
     main_flow()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Laporan JSON lokal per run training (satu file per nama, ditimpa tiap run)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "reports/profiles")
+# tracemalloc memperlambat kode yang banyak alokasi; bisa dimatikan (PROFILE_MEMORY=0)
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "1") != "0"
+
+_MB = 1024 ** 2
+
+
+class StageProfiler:
+    """
+    Mencatat durasi + peak memori (tracemalloc) tiap tahap secara berurutan:
+
+        profiler = StageProfiler("BBRI.JK")
+        with profiler.stage("fit"):
+            model.fit(X, y)
+        profiler.report()
+    """
+
+    def __init__(self, name, track_memory=PROFILE_MEMORY, metadata=None):
+        self.name = name
+        self.track_memory = track_memory
+        self.metadata = dict(metadata or {})
+        self.stages = []
+
+    @contextmanager
+    def stage(self, stage_name):
+        started_tracing = False
+        mem_start = 0
+        if self.track_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            mem_start = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"stage": stage_name, "seconds": time.perf_counter() - start}
+            if self.track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                entry["peak_mb"] = max(0, peak - mem_start) / _MB
+                entry["net_mb"] = (current - mem_start) / _MB
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(entry)
+
+    def report(self):
+        return {
+            "name": self.name,
+            "created_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "total_seconds": sum(s["seconds"] for s in self.stages),
+            "peak_mb": max((s.get("peak_mb", 0) for s in self.stages), default=0) if self.track_memory else None,
+            "metadata": self.metadata,
+            "stages": self.stages,
+        }
+
+    def table_rows(self):
+        """Baris siap tampil (dibulatkan) untuk artifact tabel Prefect."""
+        total = sum(s["seconds"] for s in self.stages) or 1.0
+        return [
+            {
+                "Tahap": s["stage"],
+                "Detik": round(s["seconds"], 4),
+                "Porsi (%)": round(s["seconds"] / total * 100, 1),
+                "Peak (MB)": round(s["peak_mb"], 2) if "peak_mb" in s else "-",
+            }
+            for s in self.stages
+        ]
+
+    def save(self, profile_dir=PROFILE_DIR):
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{self.name.replace('.', '_')}.json")
+        # Nama sementara unik: profil yang sama bisa disimpan paralel
+        fd, tmp_path = tempfile.mkstemp(dir=profile_dir, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+def load_report(name, profile_dir=PROFILE_DIR):
+    with open(os.path.join(profile_dir, f"{name.replace('.', '_')}.json")) as f:
+        return json.load(f)
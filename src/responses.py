@@ -0,0 +1,112 @@
+import gzip
+import json
+import numpy as np
+from flask import Response, request, stream_with_context
+
+try:
+    import orjson
+except ImportError:  # fallback ke json bawaan (lebih lambat)
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Payload kecil tidak dikompres: overhead header lebih besar dari hematnya
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """Serialize ke bytes JSON. Array/skalar NumPy diserialisasi langsung."""
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def wants_compact(payload=None):
+    """
+    Mode compact diminta lewat query string (?format=compact) atau field
+    "format": "compact" di body JSON.
+    """
+    if request.args.get("format") == "compact":
+        return True
+    return isinstance(payload, dict) and payload.get("format") == "compact"
+
+
+def _accepted_encodings():
+    accepted = {}
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.lower()] = q
+    return accepted
+
+
+def negotiate_encoding():
+    accepted = _accepted_encodings()
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def json_response(payload, status=200):
+    """Pengganti jsonify: encoder cepat + kompresi gzip/br sesuai Accept-Encoding."""
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+
+    encoding = negotiate_encoding() if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(body, status=status, mimetype="application/json", headers=headers)
+
+
+def sse_event(event, data):
+    """Satu event Server-Sent Events (data berupa JSON satu baris)."""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def sse_response(events):
+    """
+    Stream event SSE apa adanya (tanpa kompresi, supaya tiap event langsung
+    terkirim). X-Accel-Buffering mematikan buffering di reverse proxy.
+    """
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
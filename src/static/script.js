@@ -25,7 +25,8 @@ document.getElementById('predictionForm').addEventListener('submit', async (e) =
             },
             body: JSON.stringify({ 
                 ticker: ticker,
-                days: 7  // Fixed 7 days
+                days: 7,  // Fixed 7 days
+                format: 'compact'  // array kolom saja, tanpa forecast_table
             })
         });
         
@@ -45,6 +46,17 @@ document.getElementById('predictionForm').addEventListener('submit', async (e) =
     }
 });
 
+// Bentuk ulang baris tabel dari array kolom (response mode compact)
+function forecastRows(data) {
+    const c = data.chart_data;
+    return c.forecast_dates.map((date, i) => ({
+        date: date,
+        price: c.forecast_prices[i],
+        pct: c.forecast_change_pct[i],
+        change: (c.forecast_change_pct[i] > 0 ? '+' : '') + c.forecast_change_pct[i].toFixed(2) + '%'
+    }));
+}
+
 function displayResults(data) {
     const result = document.getElementById('predictionResult');
     result.classList.add('show');
@@ -66,14 +78,14 @@ function displayResults(data) {
     document.getElementById('currentPrice').textContent = 
         'Rp ' + data.meta.current_price.toLocaleString('id-ID');
     
-    const lastForecast = data.forecast_table[data.forecast_table.length - 1];
+    const rows = forecastRows(data);
+    const lastForecast = rows[rows.length - 1];
     document.getElementById('futurePrice').textContent = 
         'Rp ' + lastForecast.price.toLocaleString('id-ID');
     
-    const changeValue = lastForecast.change;
     const changeElement = document.getElementById('priceChange');
-    changeElement.textContent = changeValue;
-    changeElement.className = 'value ' + (changeValue.startsWith('+') ? 'price-up' : 'price-down');
+    changeElement.textContent = lastForecast.change;
+    changeElement.className = 'value ' + (lastForecast.pct >= 0 ? 'price-up' : 'price-down');
     
     // Update chart
     updateChart(data);
@@ -186,9 +198,9 @@ function updateTable(data) {
     const tbody = document.getElementById('forecastBody');
     tbody.innerHTML = '';
     
-    data.forecast_table.forEach(row => {
+    forecastRows(data).forEach(row => {
         const tr = document.createElement('tr');
-        const changeClass = row.change.startsWith('+') ? 'price-up' : 'price-down';
+        const changeClass = row.pct >= 0 ? 'price-up' : 'price-down';
         
         tr.innerHTML = `
             <td>${row.date}</td>
@@ -357,21 +369,39 @@ async function calculatePortfolio() {
 
     // Show loading
     document.getElementById('portfolioLoading').classList.add('show');
+    resetPortfolioResults();
 
     try {
-        const resp = await fetch('/portfolio', {
+        // Streaming (SSE): setiap saham dirender segera setelah selesai dihitung
+        const resp = await fetch('/portfolio/stream', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ positions, days: 7 })
+            headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+            body: JSON.stringify({ positions, days: 7, format: 'compact' })
         });
 
-        const data = await resp.json();
         if (!resp.ok) {
+            const data = await resp.json();
             alert('Error: ' + (data.error || 'Unknown'));
             return;
         }
 
-        renderPortfolioResults(data);
+        await readEventStream(resp, (event, data) => {
+            if (event === 'position') {
+                appendPortfolioPosition(data);
+            } else if (event === 'totals') {
+                renderPortfolioDaily(data.dates, data.totals);
+                renderPortfolioSummary({
+                    total_current: data.total_current,
+                    total_projected_end: data.totals[data.totals.length - 1]
+                });
+            } else if (event === 'summary') {
+                renderPortfolioSummary(data.meta);
+                renderPortfolioDaily(data.daily_breakdown_horizontal.dates, data.daily_breakdown_horizontal.totals);
+                document.getElementById('portfolioLoading').classList.remove('show');
+            } else if (event === 'error') {
+                alert('Error: ' + (data.error || 'Unknown'));
+            }
+        });
 
     } catch (err) {
         console.error(err);
@@ -381,57 +411,104 @@ async function calculatePortfolio() {
     }
 }
 
-function renderPortfolioResults(data) {
-    // Summary
-    document.getElementById('totalCurrent').textContent = 'Rp ' + data.meta.total_current.toLocaleString('id-ID');
-    document.getElementById('totalProjected').textContent = 'Rp ' + data.meta.total_projected_end.toLocaleString('id-ID');
-    const change = data.meta.total_change >= 0 ? ('+' + data.meta.total_change) : (data.meta.total_change);
-    const changeEl = document.getElementById('totalChange');
-    changeEl.textContent = change + ' (' + (data.meta.total_change_pct) + '%)';
-    changeEl.className = 'value ' + (data.meta.total_change >= 0 ? 'price-up' : 'price-down');
+// Parser Server-Sent Events untuk response fetch() (EventSource tidak mendukung POST)
+async function readEventStream(resp, onEvent) {
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+
+            let event = 'message';
+            const dataLines = [];
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            });
+            if (dataLines.length) onEvent(event, JSON.parse(dataLines.join('\n')));
+        }
+    }
+}
 
-    // Per-ticker table
-    const tbody = document.getElementById('portfolioTableBody');
-    tbody.innerHTML = '';
-    data.positions.forEach(p => {
-        const tr = document.createElement('tr');
-        tr.innerHTML = `
-            <td>${p.ticker}</td>
-            <td>Rp ${p.investment.toLocaleString('id-ID')}</td>
-            <td>Rp ${p.forecast_values[p.forecast_values.length - 1].toLocaleString('id-ID')}</td>
-            <td>${p.shares}</td>
-        `;
-        tbody.appendChild(tr);
+function resetPortfolioResults() {
+    document.getElementById('portfolioTableBody').innerHTML = '';
+    document.getElementById('portfolioDailyBody').innerHTML = '';
+    ['totalCurrent', 'totalProjected', 'totalChange'].forEach(id => {
+        document.getElementById(id).textContent = '-';
     });
+    if (portfolioChart) {
+        portfolioChart.destroy();
+        portfolioChart = null;
+    }
+    document.getElementById('portfolioResult').classList.add('show');
+}
 
+function renderPortfolioSummary(meta) {
+    document.getElementById('totalCurrent').textContent = 'Rp ' + meta.total_current.toLocaleString('id-ID');
+    document.getElementById('totalProjected').textContent = 'Rp ' + meta.total_projected_end.toLocaleString('id-ID');
+
+    const totalChange = meta.total_change !== undefined
+        ? meta.total_change
+        : Math.round((meta.total_projected_end - meta.total_current) * 100) / 100;
+    const totalChangePct = meta.total_change_pct !== undefined
+        ? meta.total_change_pct
+        : (meta.total_current > 0 ? Math.round(totalChange / meta.total_current * 10000) / 100 : 0);
+
+    const change = totalChange >= 0 ? ('+' + totalChange) : totalChange;
+    const changeEl = document.getElementById('totalChange');
+    changeEl.textContent = change + ' (' + totalChangePct + '%)';
+    changeEl.className = 'value ' + (totalChange >= 0 ? 'price-up' : 'price-down');
+}
+
+function appendPortfolioPosition(p) {
+    const tr = document.createElement('tr');
+    tr.innerHTML = `
+        <td>${p.ticker}</td>
+        <td>Rp ${p.investment.toLocaleString('id-ID')}</td>
+        <td>Rp ${p.forecast_values[p.forecast_values.length - 1].toLocaleString('id-ID')}</td>
+        <td>${p.shares}</td>
+    `;
+    document.getElementById('portfolioTableBody').appendChild(tr);
+}
+
+function renderPortfolioDaily(dates, totals) {
     // Daily breakdown table
     const dailyBody = document.getElementById('portfolioDailyBody');
     dailyBody.innerHTML = '';
-    const chartLabels = [];
-    const chartValues = [];
 
-    data.daily_breakdown.forEach(d => {
+    dates.forEach((date, i) => {
         const tr = document.createElement('tr');
         tr.innerHTML = `
-            <td>${d.date}</td>
-            <td>Rp ${Math.round(d.total).toLocaleString('id-ID')}</td>
+            <td>${date}</td>
+            <td>Rp ${Math.round(totals[i]).toLocaleString('id-ID')}</td>
         `;
         dailyBody.appendChild(tr);
-        chartLabels.push(d.date);
-        chartValues.push(d.total);
     });
 
-    // Draw chart
-    const ctx = document.getElementById('portfolioChart');
-    if (portfolioChart) portfolioChart.destroy();
+    // Chart cukup di-update datanya jika sudah ada
+    if (portfolioChart) {
+        portfolioChart.data.labels = dates;
+        portfolioChart.data.datasets[0].data = totals;
+        portfolioChart.update();
+        return;
+    }
 
+    const ctx = document.getElementById('portfolioChart');
     portfolioChart = new Chart(ctx, {
         type: 'line',
         data: {
-            labels: chartLabels,
+            labels: dates,
             datasets: [{
                 label: 'Total Portfolio (Rp)',
-                data: chartValues,
+                data: totals,
                 borderColor: '#2ecc71',
                 backgroundColor: 'rgba(46,204,113,0.08)',
                 tension: 0.3,
@@ -444,8 +521,4 @@ function renderPortfolioResults(data) {
             scales: { y: { ticks: { callback: v => 'Rp ' + Math.round(v).toLocaleString('id-ID') } } }
         }
     });
-
-    // Show result
-    const result = document.getElementById('portfolioResult');
-    result.classList.add('show');
-}
\ No newline at end of file
+}
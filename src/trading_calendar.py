@@ -0,0 +1,129 @@
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# File hari libur bursa (satu tanggal per baris, '#' = komentar)
+HOLIDAYS_PATH = os.getenv("IDX_HOLIDAYS_PATH", "data/calendar/idx_holidays.txt")
+# Index hari bursa dibuat sekali untuk rentang ini dan diperpanjang bila perlu
+CALENDAR_START = "2000-01-01"
+CALENDAR_YEARS_AHEAD = 5
+# Jumlah kombinasi (last_date, horizon) tanggal forecast yang disimpan
+FORECAST_DATES_CACHE_SIZE = 1024
+
+
+def load_holidays(path=HOLIDAYS_PATH):
+    """Baca file hari libur -> DatetimeIndex (kosong jika file tidak ada)."""
+    if not os.path.exists(path):
+        return pd.DatetimeIndex([])
+    dates = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                dates.append(line)
+    return pd.DatetimeIndex(pd.to_datetime(dates)).normalize().unique().sort_values()
+
+
+class TradingCalendar:
+    """
+    Index hari bursa (Senin-Jumat tanpa hari libur) yang dihitung sekali.
+    Tanggal forecast N hari ke depan = satu searchsorted + slice, bukan loop
+    per hari.
+    """
+
+    def __init__(self, holidays=None):
+        self.holidays = pd.DatetimeIndex(holidays if holidays is not None else [])
+        # Tahun terakhir yang punya daftar libur; setelahnya hanya akhir pekan dilewati
+        self.covered_until = int(self.holidays.max().year) if len(self.holidays) else None
+        self._warned = False
+        self.sessions = pd.DatetimeIndex([])
+        self._extend(pd.Timestamp.today().normalize() + pd.DateOffset(years=CALENDAR_YEARS_AHEAD))
+
+    def _extend(self, until):
+        end = max(pd.Timestamp(until), self.sessions[-1] if len(self.sessions) else until)
+        weekdays = pd.bdate_range(CALENDAR_START, end)
+        self.sessions = weekdays[~weekdays.isin(self.holidays)]
+
+    def is_session(self, date):
+        date = pd.Timestamp(date).normalize()
+        pos = self.sessions.searchsorted(date)
+        return pos < len(self.sessions) and self.sessions[pos] == date
+
+    def next_sessions(self, last_date, n):
+        """N hari bursa setelah last_date (DatetimeIndex)."""
+        last_date = pd.Timestamp(last_date).normalize()
+        start = self.sessions.searchsorted(last_date, side="right")
+        while start + n > len(self.sessions):
+            # Perpanjang dengan margin (~7/5 hari kalender per hari bursa + libur)
+            self._extend(max(last_date, self.sessions[-1]) + pd.Timedelta(days=2 * n + 30))
+            start = self.sessions.searchsorted(last_date, side="right")
+        sessions = self.sessions[start:start + n]
+        if len(sessions) and (self.covered_until is None or sessions[-1].year > self.covered_until):
+            self._warn_uncovered(sessions[-1])
+        return sessions
+
+    def _warn_uncovered(self, last_session):
+        # Sekali per kalender (kalender dibangun ulang saat file libur berubah)
+        if self._warned:
+            return
+        self._warned = True
+        covered = f"hanya sampai {self.covered_until}" if self.covered_until else "kosong"
+        print(
+            f"⚠️  [CALENDAR] Proyeksi sampai {last_session.date()} melewati daftar libur bursa "
+            f"({covered}); hari libur setelahnya dianggap hari bursa. Perbarui {HOLIDAYS_PATH}."
+        )
+
+    def next_intraday(self, last_date, steps, minutes, session_open, session_close):
+        """
+        N timestamp bar intraday setelah last_date: slot sisa hari ini (jika
+        hari bursa), lalu semua slot hari bursa berikutnya (grid dari jam buka).
+        """
+        last_date = pd.Timestamp(last_date)
+        open_time = pd.Timedelta(session_open + ":00")
+        close_time = pd.Timedelta(session_close + ":00")
+        offsets = pd.timedelta_range(open_time, close_time, freq=f"{minutes}min")
+        offsets = offsets[offsets < close_time]
+
+        day = last_date.normalize()
+        today = pd.DatetimeIndex([])
+        if self.is_session(day):
+            today = (day + offsets)[day + offsets > last_date][:steps]
+
+        remaining = steps - len(today)
+        n_days = -(-remaining // len(offsets))
+        days = self.next_sessions(day, n_days)
+        later = pd.DatetimeIndex(np.add.outer(days.values, offsets.values).ravel()[:remaining])
+        return today.append(later)
+
+
+_calendar = {"calendar": None, "mtime": None}
+_calendar_lock = threading.Lock()
+
+
+def get_calendar(path=HOLIDAYS_PATH):
+    """Kalender bersama; dibangun ulang hanya jika file libur berubah."""
+    mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    with _calendar_lock:
+        if _calendar["calendar"] is None or _calendar["mtime"] != mtime:
+            _calendar["calendar"] = TradingCalendar(load_holidays(path))
+            _calendar["mtime"] = mtime
+            _cached_forecast_dates.cache_clear()
+        return _calendar["calendar"]
+
+
+@lru_cache(maxsize=FORECAST_DATES_CACHE_SIZE)
+def _cached_forecast_dates(last_date, horizon, fmt):
+    return tuple(get_calendar().next_sessions(last_date, horizon).strftime(fmt))
+
+
+def forecast_dates(last_date, horizon, fmt="%Y-%m-%d"):
+    """
+    Tanggal forecast harian (tuple string) di-cache per (last_date, horizon):
+    semua posisi portfolio dengan tanggal data terakhir yang sama memakai
+    array yang sama.
+    """
+    get_calendar()  # reload + kosongkan cache jika file libur berubah
+    return _cached_forecast_dates(pd.Timestamp(last_date).normalize(), int(horizon), fmt)
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from src.artifact_sync import LocalDirRemote, SyncError, pull, push, status
+
+
+def _write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _read(root, rel_path):
+    with open(os.path.join(root, rel_path)) as f:
+        return f.read()
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    source = str(tmp_path / "source")
+    target = str(tmp_path / "target")
+    os.makedirs(target)
+    _write(source, "models/model_BBRI_JK.pkl", "model-bbri")
+    _write(source, "models/model_BBNI_JK.pkl", "model-bbni")
+    _write(source, "data/raw/stock_data.csv", "Date,Close,Ticker\n")
+    return source, target, LocalDirRemote(str(tmp_path / "remote"))
+
+
+def test_push_then_pull_restores_all_files(workspace):
+    source, target, remote = workspace
+
+    uploaded = push(remote, source)
+    fetched = pull(remote, target)
+
+    assert sorted(uploaded) == sorted(fetched)
+    for rel_path in fetched:
+        assert _read(target, rel_path) == _read(source, rel_path)
+
+
+def test_pull_only_fetches_changed_files(workspace):
+    source, target, remote = workspace
+    push(remote, source)
+    pull(remote, target)
+
+    assert pull(remote, target) == []
+
+    _write(source, "models/model_BBRI_JK.pkl", "model-bbri-v2")
+    assert push(remote, source) == ["models/model_BBRI_JK.pkl"]
+    assert list(status(remote, target)) == ["models/model_BBRI_JK.pkl"]
+    assert pull(remote, target) == ["models/model_BBRI_JK.pkl"]
+    assert _read(target, "models/model_BBRI_JK.pkl") == "model-bbri-v2"
+
+
+def test_partial_push_keeps_other_manifest_entries(workspace):
+    source, target, remote = workspace
+    push(remote, source)
+
+    _write(source, "models/model_BBRI_JK.pkl", "model-bbri-v2")
+    push(remote, source, paths=["models"])
+
+    files = remote.read_manifest()["files"]
+    assert "data/raw/stock_data.csv" in files
+    assert sorted(pull(remote, target)) == sorted(files)
+
+
+def test_pull_rejects_corrupted_object(workspace):
+    source, target, remote = workspace
+    push(remote, source)
+    _write(target, "models/model_BBRI_JK.pkl", "local-copy")
+
+    sha = remote.read_manifest()["files"]["models/model_BBRI_JK.pkl"]["sha256"]
+    with open(remote._object_path(sha), "w") as f:
+        f.write("corrupted")
+
+    with pytest.raises(SyncError):
+        pull(remote, target, paths=["models/model_BBRI_JK.pkl"])
+    assert _read(target, "models/model_BBRI_JK.pkl") == "local-copy"
+
+
+def test_push_uploads_identical_files_once(workspace):
+    source, target, remote = workspace
+    payload = "x" * (1024 * 1024)
+    for i in range(8):
+        _write(source, f"models/model_COPY{i}_JK.pkl", payload)
+
+    push(remote, source, workers=8)
+
+    objects_dir = os.path.join(remote.root, "objects")
+    stored = [name for _, _, names in os.walk(objects_dir) for name in names]
+    assert not [name for name in stored if name.endswith(".tmp")]
+    shas = {entry["sha256"] for entry in remote.read_manifest()["files"].values()}
+    assert sorted(stored) == sorted(shas)
+
+    fetched = pull(remote, target)
+    for i in range(8):
+        assert f"models/model_COPY{i}_JK.pkl" in fetched
+        assert _read(target, f"models/model_COPY{i}_JK.pkl") == payload
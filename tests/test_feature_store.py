@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from src import feature_store
+from src.feature_store import load_features, materialize_features
+
+N_DAYS = 120
+HISTORY_DAYS = 100
+
+
+@pytest.fixture
+def bars():
+    return synthetic_ohlcv(n_tickers=2, n_days=N_DAYS)
+
+
+def _write_csv(path, bars, n_days):
+    bars[bars.groupby('Ticker').cumcount() < n_days].to_csv(path, index=False)
+
+
+def _assert_same_features(actual, expected):
+    for name in ("X", "y", "dates", "close"):
+        np.testing.assert_allclose(
+            np.asarray(actual[name], dtype='float64'), np.asarray(expected[name], dtype='float64'),
+            rtol=1e-6, atol=1e-9, err_msg=name,
+        )
+    assert actual["feature_names"] == expected["feature_names"]
+    assert actual["state"]["closes"] == pytest.approx(expected["state"]["closes"])
+    assert actual["state"]["n_deltas"] == expected["state"]["n_deltas"]
+
+
+def test_appended_bars_match_full_rebuild(tmp_path, bars, capsys):
+    data_path = str(tmp_path / "stock_data.csv")
+    cache_dir = str(tmp_path / "features")
+
+    _write_csv(data_path, bars, HISTORY_DAYS)
+    materialize_features(data_path, cache_dir=cache_dir)
+    _write_csv(data_path, bars, N_DAYS)
+    capsys.readouterr()
+
+    extended = materialize_features(data_path, cache_dir=cache_dir)
+    assert "Diperbarui inkremental" in capsys.readouterr().out
+
+    rebuilt = materialize_features(data_path, cache_dir=str(tmp_path / "fresh"))
+    feature_store._memory_cache.clear()
+    assert sorted(extended) == sorted(rebuilt)
+    for ticker, feature_set in rebuilt.items():
+        assert len(extended[ticker]["X"]) == N_DAYS
+        _assert_same_features(extended[ticker], feature_set)
+        # Hasil yang sama juga terbaca kembali dari disk (.npy hasil append)
+        _assert_same_features(load_features(data_path, ticker, cache_dir=cache_dir), feature_set)
+
+
+def test_materialize_leaves_no_temp_files(tmp_path, bars):
+    data_path = str(tmp_path / "stock_data.csv")
+    cache_dir = str(tmp_path / "features")
+
+    _write_csv(data_path, bars, HISTORY_DAYS)
+    materialize_features(data_path, cache_dir=cache_dir)
+    _write_csv(data_path, bars, N_DAYS)
+    materialize_features(data_path, cache_dir=cache_dir)
+
+    leftovers = [
+        name for _, _, files in os.walk(cache_dir) for name in files
+        if not name.endswith((".npy", ".json"))
+    ]
+    assert leftovers == []
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from src.indicators import BASE_FEATURES, DEFAULT_FEATURES, IndicatorEngine
+
+FEATURES = DEFAULT_FEATURES + ['ret_10', 'sma_1', 'vol_5', 'rsi_2', 'rsi_30', 'vz_5']
+
+
+@pytest.fixture
+def bars():
+    return synthetic_ohlcv(n_tickers=1, n_days=300)
+
+
+def _advance(engine, history, new_bars):
+    """compute() atas histori, lalu update() bar demi bar."""
+    _, state = engine.compute(history)
+    return np.vstack([engine.update(state, bar) for bar in new_bars[BASE_FEATURES].to_dict('records')])
+
+
+@pytest.mark.parametrize("split", [1, 2, 3, 15, 31, 150, 299])
+def test_update_matches_compute_on_full_history(bars, split):
+    engine = IndicatorEngine(FEATURES)
+    expected, _ = engine.compute(bars)
+
+    rows = _advance(engine, bars.iloc[:split], bars.iloc[split:])
+
+    np.testing.assert_allclose(rows, expected.to_numpy()[split:], rtol=1e-9, atol=1e-9)
+
+
+def test_update_fills_missing_values_like_compute(bars):
+    bars = bars.copy()
+    bars.loc[[40, 41, 120], 'Volume'] = np.nan
+    bars.loc[[80, 200], 'Close'] = np.nan
+    engine = IndicatorEngine(FEATURES)
+    expected, _ = engine.compute(bars)
+
+    rows = _advance(engine, bars.iloc[:30], bars.iloc[30:])
+
+    np.testing.assert_allclose(rows, expected.to_numpy()[30:], rtol=1e-9, atol=1e-9)